@@ -15,8 +15,11 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
+# Local imports
+from utils.data_store import DEFICIENCY_TABLE, read_table
+
 # Constants
-DATA_PATH = "data/EDA/deficiency_data.xlsx"
+DATA_PATH = DEFICIENCY_TABLE  # falls back to deficiency_data.xlsx until converted
 DISEASE_COLUMNS = [
     'Age', 'Gender', 'Diet Type', 'Living Environment', 'Night Blindness',
     'Dry Eyes', 'Bleeding Gums', 'Fatigue', 'Tingling Sensation',
@@ -105,7 +108,7 @@ def create_header():
 
 def load_data(file_path: str) -> pd.DataFrame:
     try:
-        return pd.read_excel(file_path)
+        return read_table(file_path, columns=DISEASE_COLUMNS)
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
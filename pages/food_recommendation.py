@@ -1,7 +1,8 @@
-import pandas as pd
 import streamlit as st
 from datetime import date
-from utils.food_recommend import recommend_food
+from utils.catalogue_stats import FOOD_STATS_PATH, catalogue_stats, load_stats
+from utils.data_store import FOOD_TABLE, read_table
+from utils.food_recommend import DEFICIENCY_OPTIONS, MAX_SELECTIONS, recommend_food
 
 st.set_page_config(page_title="Food Recommendation System", layout="wide")
 
@@ -100,16 +101,15 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 def load_data():
-    """Load processed food data and extract unique categories."""
-    df = pd.read_csv("data/preprocessed/food.csv")
-    original_df = pd.read_csv("data/original/food.csv")
-    categories = df["main_category"].unique().tolist()
-    deficiencies = [
-        'vitamin_D', 'calcium',  'vitamin_C', 'iron', 'potassium', 
-        'vitamin_B_6', 'vitamin_B_12', 'vitamin_A', 'riboflavin', 'vitamin_E', 'folate_total',
-        'vitamin_K', 'zinc', 'magnesium','sodium',  'thiamin', 'Niacin',  'selenium'
-    ]
-    return df, original_df, categories, deficiencies
+    """Categories and nutrient maxima of the food catalogue, from the stats manifest."""
+    deficiencies = DEFICIENCY_OPTIONS
+    stats = load_stats(FOOD_STATS_PATH)
+    if stats is None:  # manifest not written yet: scan the columns this page shows
+        stats = catalogue_stats(read_table(FOOD_TABLE, columns=["main_category"] + deficiencies),
+                                deficiencies, ["main_category"])
+    categories = stats["categories"]["main_category"]
+    nutrient_max = {nutrient: stats["columns"][nutrient]["max"] for nutrient in deficiencies}
+    return categories, deficiencies, nutrient_max
 
 def calculate_bmi(weight, height):
     """Calculate and categorize BMI."""
@@ -223,7 +223,7 @@ def main():
         st.session_state['previous_deficiencies'] = []
 
     # Load Data
-    df, original_df, categories, deficiencies = load_data()
+    categories, deficiencies, nutrient_max = load_data()
 
     # Sidebar Input
     
@@ -251,7 +251,7 @@ def main():
         st.rerun()
     
     # Maximum number of selections allowed
-    max_selections = 3
+    max_selections = MAX_SELECTIONS
 
     st.sidebar.write("Select Deficiencies:")
     cols = st.sidebar.columns(2)
@@ -395,7 +395,7 @@ def main():
 
                             for nutrient, value in nutrient_dict.items():
 
-                                max_value = max(original_df[nutrient])
+                                max_value = nutrient_max[nutrient]
                                 #st.write(max_value)
                                 # Calculate percentage for the circular progress bar, ensuring it doesn't exceed 100%
                                 percentage = int((value / max_value) * 100)  # Limit percentage to 100
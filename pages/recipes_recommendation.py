@@ -1,8 +1,9 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
-import re
-from utils.recipes_recommend import recommend_recipes
+from utils.catalogue_stats import RECIPES_STATS_PATH, catalogue_stats, load_stats
+from utils.recipes_lists import as_list
+from utils.recipes_preprocess import read_preprocessed_recipes
+from utils.recipes_recommend import get_recommender, recommend_recipes
 
 # Set page config
 st.set_page_config(page_title="Recipe Recommendations", layout="wide")
@@ -87,12 +88,9 @@ st.markdown("""
         }
     </style>
 """, unsafe_allow_html=True)
-def extract_image_urls(image_str):
-    """Extract image URLs from the 'c(\"...\")' format."""
-    if isinstance(image_str, str):
-        image_urls = re.findall(r'"(https?://[^\s]+)"', image_str)
-        return image_urls
-    return []
+def extract_image_urls(images):
+    """Image URLs of a recipe (the Images list column)."""
+    return [url for url in as_list(images) if url.startswith(("http://", "https://"))]
 
 def show_nutrition_pie_chart(recipe):
     """Generate a visually appealing pie chart for nutrient content with custom styling."""
@@ -181,31 +179,17 @@ def show_nutrition_pie_chart(recipe):
     # Display the chart
     st.pyplot(fig)
 
-def format_recipe_instructions(instructions_str):
-    """Format recipe instructions into clean, readable steps."""
-    if not isinstance(instructions_str, str):
-        return None
-        
-    # Clean up the string
-    instructions = (instructions_str
-                   .replace('c(', '')
-                   .replace(')"', '')
-                   .replace('"', '')
-                   .strip())
-    
-    # Split into steps and clean each step
+def format_recipe_instructions(instructions):
+    """Format recipe instructions (the RecipeInstructions list column) into clean, readable steps."""
     steps = []
-    for step in instructions.split('.,'):  # Split on period-comma combination
+    for step in as_list(instructions):
         # Clean the step text
         step = step.strip()
         # Remove any leading/trailing periods
         step = step.strip('.')
-        # Add back the period if it doesn't end with one
-        if not step.endswith('.'):
-            step += '.'
-        if step:  # Only add non-empty steps
-            steps.append(step)
-    
+        if step:  # Only add non-empty steps, with a single closing period
+            steps.append(step + '.')
+
     return steps
 
 def display_recipe_instructions(instructions):
@@ -295,21 +279,9 @@ def display_recipe_instructions(instructions):
     # Display all steps at once in the container
     st.markdown(steps_html, unsafe_allow_html=True)
 
-def format_recipe_ingredients(ingredients_str):
-    """Format recipe ingredients into a clean list."""
-    if not isinstance(ingredients_str, str):
-        return None
-        
-    # Clean up the string
-    ingredients = (ingredients_str
-                  .replace('c(', '')
-                  .replace(')"', '')
-                  .replace('("', '')
-                  .replace('"', '')
-                  .strip())
-    
-    # Split and clean ingredients
-    return [ing.strip().capitalize() for ing in ingredients.split(',') if ing.strip()]
+def format_recipe_ingredients(ingredients):
+    """Format recipe ingredients (the RecipeIngredientParts list column) into a clean list."""
+    return [ing.strip().capitalize() for ing in as_list(ingredients) if ing.strip()]
 
 def display_recipe_ingredients(ingredients):
     """Display recipe ingredients with compact capsule-shaped formatting."""
@@ -463,9 +435,6 @@ def recipes_recommendation_sidebar():
         if 'selected_foods' in st.session_state:
             display_selected_foods(st.session_state.selected_foods)
         
-        # Load dataset for slider min-max values
-        df = pd.read_csv("data/preprocessed/recipes.csv")
-
         user_data = st.session_state['user_data']
         diet_preference = user_data.get('food_preference', None)
         selected_foods = st.session_state['selected_foods']
@@ -486,6 +455,13 @@ def recipes_recommendation_sidebar():
             ("Protein", "ProteinContent")
         ]
 
+        # Slider min-max values from the stats manifest written by recipes_preprocess
+        stats = load_stats(RECIPES_STATS_PATH)
+        if stats is None:  # manifest not written yet: scan the slider columns
+            keys = [key for _, key in nutrients]
+            stats = catalogue_stats(read_preprocessed_recipes(columns=keys), keys)
+        ranges = stats["columns"]
+
         user_nutrients = {}
 
         for display_name, key in nutrients:
@@ -498,23 +474,39 @@ def recipes_recommendation_sidebar():
             with cols[1]:
                 user_nutrients[key] = st.slider(
                     "##",  # Hidden label
-                    min_value=float(df[key].min()),
-                    max_value=float(df[key].max()),
-                    value=float(df[key].min()),
+                    min_value=ranges[key]["min"],
+                    max_value=ranges[key]["max"],
+                    value=ranges[key]["min"],
                     step=0.1,
                     label_visibility="collapsed"  # This ensures the label is hidden
                 )
 
+        # "Nutrients only" ranks the whole catalogue by distance to the slider targets
+        search_label = st.sidebar.radio(
+            "Match recipes on",
+            ["Ingredients & nutrients", "Best overall blend", "Nutrients only"],
+            horizontal=True,
+        )
+        search_mode = {"Nutrients only": "nutrient", "Best overall blend": "hybrid"}.get(search_label, "exact")
+
+        # Recipe index is loaded once per server process and shared by all sessions
+        recommender_status = get_recommender().status()
+        if recommender_status["loaded"]:
+            st.sidebar.caption(f"🟢 Recipe index ready ({recommender_status['recipes']} recipes)")
+        else:
+            st.sidebar.caption("⚪ Recipe index loads on the first search")
+
         if st.sidebar.button("Find Recipes"):
             if not diet_preference or any(value is None for value in user_nutrients.values()):
                 st.warning("Please select your dietary preferences and adjust the sliders before proceeding.")
                 return
 
-            if not selected_foods:
+            if not selected_foods and search_mode != "nutrient":
                 st.error("No ingredients found. Please get food recommendations first.")
                 return
 
-            st.session_state["recommended_recipes"] = recommend_recipes(user_nutrients, selected_foods, diet_preference)
+            st.session_state["recommended_recipes"] = recommend_recipes(user_nutrients, selected_foods, diet_preference,
+                                                                        mode=search_mode)
 
         # Ensure recipes persist across reruns
         recommended_recipes = st.session_state.get("recommended_recipes", [])
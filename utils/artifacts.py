@@ -0,0 +1,92 @@
+import glob
+import hashlib
+import os
+import re
+import shutil
+import time
+
+# Versioned directories published by swap_directory: <target>.v<time_ns>
+VERSION_PATTERN = re.compile(r"\.v\d+$")
+
+
+def artifact_signature(paths):
+    """
+    Build a cheap fingerprint of a set of artifact files.
+    Args:
+        paths (list): files (or directories) the loaded state depends on
+    Returns:
+        tuple: (path, mtime_ns, size) per path, None for missing paths
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature.append((path, None, None))
+            continue
+        signature.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def content_signature(paths, chunk_size=1 << 20):
+    """
+    Fingerprint a set of artifact files by their bytes, for state persisted next to them.
+    Unlike artifact_signature it survives a copy, checkout or restore that changes mtimes, and
+    catches a rewrite that keeps the same mtime and size.
+    Args:
+        paths (list): files the persisted state was computed from
+    Returns:
+        tuple: (path, sha256 hex digest) per path, None for missing paths
+    """
+    signature = []
+    for path in paths:
+        digest = hashlib.sha256()
+        try:
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(chunk_size), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            signature.append((path, None))
+            continue
+        signature.append((path, digest.hexdigest()))
+    return tuple(signature)
+
+
+def swap_directory(staging_dir, target_dir):
+    """
+    Publish staging_dir as target_dir so readers never see a half-written or missing store.
+    target_dir is a symlink to a versioned directory (<target>.v<n>); publishing renames the staging
+    directory to a new version and flips the link with a single os.replace, so a path under
+    target_dir always resolves to either the old or the new version. The previous version is kept for
+    readers still loading from it; older versions are removed.
+    A target that is still a plain directory becomes the first version; that one-time conversion is
+    two renames.
+    """
+    target_dir = target_dir.rstrip("/")
+    version_dir = f"{target_dir}.v{time.time_ns()}"
+    os.replace(staging_dir, version_dir)
+
+    previous_dir = None
+    if os.path.islink(target_dir):
+        previous_dir = os.path.join(os.path.dirname(target_dir), os.readlink(target_dir))
+    elif os.path.isdir(target_dir):
+        previous_dir = f"{target_dir}.v0"
+        os.replace(target_dir, previous_dir)
+
+    link_path = target_dir + ".link"
+    if os.path.lexists(link_path):
+        os.remove(link_path)
+    os.symlink(os.path.basename(version_dir), link_path)
+    os.replace(link_path, target_dir)
+
+    keep = {os.path.abspath(version_dir), os.path.abspath(previous_dir or version_dir)}
+    stale = [path for path in glob.glob(glob.escape(target_dir) + ".v*") if VERSION_PATTERN.search(path)]
+    stale.append(target_dir + ".previous")  # left by the earlier rename-based swap
+    for path in stale:
+        if os.path.abspath(path) not in keep and os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def resolve_directory(path):
+    """The version directory a published path points to now; read every file of one load from it."""
+    return os.path.realpath(path)
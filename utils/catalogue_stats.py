@@ -0,0 +1,66 @@
+import json
+import os
+
+# Small JSON manifests of catalogue statistics written by the preprocessing scripts, so the pages
+# get slider ranges, category lists and row counts without reading the catalogues on every rerun.
+#   {"rows": n, "columns": {column: {"min", "max", "mean", "quantiles": {"5": .., "25": ..}}},
+#    "categories": {column: [values]}, "counts": {column: {value: n}}}
+RECIPES_STATS_PATH = "data/preprocessed/recipes_stats.json"
+FOOD_STATS_PATH = "data/preprocessed/food_stats.json"
+QUANTILES = [5, 25, 50, 75, 95]
+
+_cache = {}
+
+
+def catalogue_stats(df, numeric_columns, category_columns=()):
+    """
+    Statistics of a catalogue table.
+    Args:
+        df (DataFrame): the catalogue (at least the listed columns)
+        numeric_columns (list): columns summarised by range, mean and quantiles
+        category_columns (list): columns summarised by their sorted values and counts
+    Returns:
+        dict: the manifest content
+    """
+    quantiles = df[numeric_columns].quantile([q / 100 for q in QUANTILES])
+    columns = {}
+    for column in numeric_columns:
+        values = df[column]
+        columns[column] = {
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "mean": float(values.mean()),
+            "quantiles": {str(q): float(quantiles[column].iloc[i]) for i, q in enumerate(QUANTILES)},
+        }
+    categories, counts = {}, {}
+    for column in category_columns:
+        values = df[column].dropna().astype(str)
+        categories[column] = values.unique().tolist()  # first-seen order, like Series.unique()
+        counts[column] = {value: int(count) for value, count in values.value_counts().sort_index().items()}
+    return {"rows": int(len(df)), "columns": columns, "categories": categories, "counts": counts}
+
+
+def save_stats(stats, path):
+    """Write the manifest atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as stats_file:
+        json.dump(stats, stats_file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_stats(path):
+    """
+    Read a manifest, parsed once per file version (a rerun costs one stat call).
+    Returns None when the manifest has not been written yet.
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _cache.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path) as stats_file:
+            cached = (mtime, json.load(stats_file))
+        _cache[path] = cached
+    return cached[1]
@@ -0,0 +1,173 @@
+import glob
+import os
+import sys
+
+import pandas as pd
+
+# Typed columnar storage for the tables under data/ (Parquet through pyarrow).
+#   - read_table() reads only the requested columns and, optionally, row groups or rows
+#     matching filters (row groups whose statistics exclude the filter are skipped)
+#   - a table is one .parquet file or a directory of .parquet part files
+#   - a table that has not been converted yet is read from the CSV / Excel file with the
+#     same name, still restricted to the requested columns
+# pyarrow is imported on first use so importing a module that reads tables stays cheap.
+TABLE_SUFFIX = ".parquet"
+LEGACY_SUFFIXES = (".csv", ".xlsx")
+ROW_GROUP_SIZE = 65536
+
+# Tables of the app
+FOOD_TABLE = "data/original/food.parquet"               # food catalogue in original units
+FOOD_FEATURES_TABLE = "data/preprocessed/food.parquet"  # min-max scaled nutrients of the KNN model
+RECIPES_TABLE = "data/preprocessed/recipes"             # recipe part files of recipes_preprocess.py
+DEFICIENCY_TABLE = "data/EDA/deficiency_data.parquet"   # survey data of the analysis page
+
+
+def _parquet():
+    import pyarrow.parquet as pq
+
+    return pq
+
+
+def table_files(path):
+    """Parquet files of a table, in order (a single file or the parts of a directory)."""
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*" + TABLE_SUFFIX)))
+    return [path] if os.path.exists(path) else []
+
+
+def legacy_path(path):
+    """Existing CSV / Excel file with the table's name, or None."""
+    stem = os.path.splitext(path.rstrip("/"))[0]
+    for suffix in LEGACY_SUFFIXES:
+        if os.path.exists(stem + suffix):
+            return stem + suffix
+    return None
+
+
+def table_exists(path):
+    return bool(table_files(path)) or legacy_path(path) is not None
+
+
+def write_table(df, path, row_group_size=ROW_GROUP_SIZE):
+    """Write df as a Parquet file, replacing path atomically."""
+    import pyarrow as pa
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    _parquet().write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path, row_group_size=row_group_size)
+    os.replace(tmp_path, path)
+
+
+class TableWriter:
+    """
+    Stream DataFrames into one Parquet file, one row group per write (all writes share the first
+    frame's schema). The file replaces path atomically on close; use as a context manager.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._tmp_path = path + ".tmp"
+        self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:  # keep the previous table
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self._tmp_path):
+                os.remove(self._tmp_path)
+
+    def write(self, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._writer = _parquet().ParquetWriter(self._tmp_path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self._tmp_path, self.path)
+            self._writer = None
+
+
+def read_table(path, columns=None, row_groups=None, filters=None):
+    """
+    Read a table into a DataFrame.
+    Args:
+        path (str): .parquet file or directory of part files
+        columns (list): columns to read (None reads all)
+        row_groups (list): row groups to read from a single file (None reads all)
+        filters (list): pyarrow filters, e.g. [("DietaryCategory", "==", "Veg")]
+    Returns:
+        DataFrame
+    """
+    files = table_files(path)
+    if not files:
+        source = legacy_path(path)
+        if source is None:
+            raise FileNotFoundError(f"No table at '{path}'")
+        return _read_legacy(source, columns, filters)
+
+    pq = _parquet()
+    if row_groups is not None:
+        if len(files) != 1:
+            raise ValueError("row_groups can only be used with a single-file table")
+        return pq.ParquetFile(files[0]).read_row_groups(row_groups, columns=columns).to_pandas()
+    tables = [pq.read_table(file, columns=columns, filters=filters) for file in files]
+    if len(tables) == 1:
+        return tables[0].to_pandas()
+    return pd.concat([table.to_pandas() for table in tables], ignore_index=True)
+
+
+def _legacy_reader(source):
+    return pd.read_excel if source.endswith(".xlsx") else pd.read_csv
+
+
+def _read_legacy(source, columns, filters):
+    df = _legacy_reader(source)(source, usecols=columns)
+    for column, op, value in filters or []:
+        if op not in ("==", "in"):
+            raise ValueError(f"Unsupported filter on a legacy table: {op}")
+        df = df[df[column] == value] if op == "==" else df[df[column].isin(value)]
+    return df.reset_index(drop=True)
+
+
+def table_columns(path):
+    """Column names of a table, read from the schema only."""
+    files = table_files(path)
+    if files:
+        return list(_parquet().read_schema(files[0]).names)
+    source = legacy_path(path)
+    if source is None:
+        raise FileNotFoundError(f"No table at '{path}'")
+    return list(_legacy_reader(source)(source, nrows=0).columns)
+
+
+def table_rows(path):
+    """Row count of a table, from the Parquet footers only."""
+    files = table_files(path)
+    if files:
+        return sum(_parquet().ParquetFile(file).metadata.num_rows for file in files)
+    return len(read_table(path, columns=table_columns(path)[:1]))
+
+
+def convert_table(source, path=None):
+    """Convert a CSV / Excel file to Parquet next to it (or at path)."""
+    path = path or os.path.splitext(source)[0] + TABLE_SUFFIX
+    write_table(_legacy_reader(source)(source), path)
+    return path
+
+
+if __name__ == "__main__":
+    # python -m utils.data_store data/EDA/deficiency_data.xlsx ...
+    for source in sys.argv[1:]:
+        print(f"✅ '{source}' converted to '{convert_table(source)}'.")
@@ -0,0 +1,61 @@
+import argparse
+import re
+
+from utils.data_store import DEFICIENCY_TABLE, read_table
+from utils.food_recommend import BATCH_CHUNK_SIZE, NUTRIENTS, recommend_food_batch
+
+# Food suggestions for every respondent of the deficiency survey behind app.py, in one batch.
+# Output: one row per respondent and recommended food, nearest first ("query" is the survey row).
+# "Predicted Deficiency" labels are matched to the model's nutrients ignoring case, spaces and
+# underscores ("Vitamin B12" -> vitamin_B_12); a vegetarian / vegan "Diet Type" gets Veg foods only.
+OUTPUT_PATH = "data/EDA/deficiency_food_recommendations.parquet"
+
+
+def _normalise(label):
+    return re.sub(r"[^a-z0-9]", "", str(label).lower())
+
+
+NUTRIENT_LABELS = {_normalise(nutrient): nutrient for nutrient in NUTRIENTS}
+
+
+def deficiency_for_label(label):
+    """Model nutrient of a survey deficiency label, or None."""
+    return NUTRIENT_LABELS.get(_normalise(label))
+
+
+def category_for_diet(diet_type):
+    """Food preference of a survey diet type."""
+    return 'Veg' if _normalise(diet_type).startswith("veg") else None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recommend foods for every row of the deficiency survey.")
+    parser.add_argument("--input", default=DEFICIENCY_TABLE, help="deficiency survey table")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="Parquet file of the recommendations")
+    parser.add_argument("--workers", type=int, default=1, help="processes searching chunks in parallel")
+    parser.add_argument("--chunk-size", type=int, default=BATCH_CHUNK_SIZE, help="respondents per search")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    survey = read_table(args.input, columns=['Diet Type', 'Predicted Deficiency'])
+    deficiencies = survey['Predicted Deficiency'].map(deficiency_for_label)
+    known = deficiencies.notna().to_numpy()
+    if not known.all():
+        unknown = sorted(survey.loc[~known, 'Predicted Deficiency'].astype(str).unique())
+        print(f"⚠️ Skipping {int((~known).sum())} rows without a model nutrient: {', '.join(unknown)}")
+
+    rows = recommend_food_batch(
+        [[deficiency] for deficiency in deficiencies[known]],
+        categories=survey.loc[known, 'Diet Type'].map(category_for_diet).tolist(),
+        output_path=args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        query_ids=survey.index[known].to_numpy(),
+    )
+    print(f"✅ {rows} recommendations for {int(known.sum())} respondents saved as '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main()
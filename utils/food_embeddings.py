@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from utils.artifacts import swap_directory
+from utils.query_cache import normalize_ingredient
+from utils.recipes_embeddings import normalize_rows
+
+# Embeddings of every food description of the food table (data/original/food.parquet), written by recipes_train_model.py.
+# The recipes page only ever queries with these descriptions, so a query can be put
+# together from stored vectors without running the sentence model.
+FOOD_EMBEDDING_DIR = "data/embeddings/foods"
+FOOD_EMBEDDINGS_FILE = "embeddings.npy"
+FOOD_KEYS_FILE = "descriptions.json"
+
+# How a query embedding is built from the stored food vectors:
+#   "pooled": normalised mean of the selected foods' vectors when every food has one, model otherwise
+#             (an approximation of the model encoding, see utils/recipes_query_mode_report.py)
+#   "exact" : stored vector when it is identical to the live encoding (single food), model otherwise
+#   "model" : always encode with the sentence model
+QUERY_MODES = ("pooled", "exact", "model")
+
+
+def food_embeddings_path(name, embedding_dir=FOOD_EMBEDDING_DIR):
+    return os.path.join(embedding_dir, name)
+
+
+def save_food_embeddings(descriptions, embeddings, embedding_dir=FOOD_EMBEDDING_DIR):
+    """
+    Write the food description store. Both files are written to a staging directory that is
+    swapped in at the end, so a running app never maps a truncated matrix or mismatched keys.
+    Args:
+        descriptions (list): normalised food descriptions, one per row
+        embeddings (array): matching embedding matrix
+        embedding_dir (str): output directory
+    """
+    staging_dir = embedding_dir.rstrip("/") + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    np.save(food_embeddings_path(FOOD_EMBEDDINGS_FILE, staging_dir), normalize_rows(embeddings))
+    with open(food_embeddings_path(FOOD_KEYS_FILE, staging_dir), "w") as keys_file:
+        json.dump(list(descriptions), keys_file)
+    swap_directory(staging_dir, embedding_dir)
+
+
+class FoodEmbeddingStore:
+    """Stored food vectors looked up by normalised description."""
+
+    def __init__(self, descriptions, embeddings):
+        self.embeddings = embeddings
+        self.rows = {description: row for row, description in enumerate(descriptions)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    @classmethod
+    def load(cls, embedding_dir=FOOD_EMBEDDING_DIR):
+        """Load the store, or return None when it has not been built."""
+        keys_path = food_embeddings_path(FOOD_KEYS_FILE, embedding_dir)
+        if not os.path.exists(keys_path):
+            return None
+        with open(keys_path) as keys_file:
+            descriptions = json.load(keys_file)
+        embeddings = np.load(food_embeddings_path(FOOD_EMBEDDINGS_FILE, embedding_dir), mmap_mode="r")
+        return cls(descriptions, embeddings)
+
+    def compose(self, key, mode):
+        """
+        Query embedding for a query_key() built from stored vectors.
+        Returns None when the stored vectors cannot answer the query in this mode.
+        """
+        if mode == "exact":
+            # A single food encodes to exactly its stored vector (same text, same model)
+            if len(key) == 1 and key[0] in self.rows:
+                return np.asarray(self.embeddings[self.rows[key[0]]])
+            return None
+        if mode == "pooled":
+            # Every food needs a stored vector, otherwise the mean would answer a different query
+            if not key or any(food not in self.rows for food in key):
+                return None
+            rows = [self.rows[food] for food in key]
+            return normalize_rows(np.asarray(self.embeddings[sorted(rows)]).mean(axis=0))
+        return None
+
+
+def food_descriptions(food_df):
+    """Unique normalised descriptions of the food table."""
+    return sorted({normalize_ingredient(description) for description in food_df["description"].dropna()})
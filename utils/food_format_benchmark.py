@@ -0,0 +1,55 @@
+import sys
+import time
+
+import numpy as np
+
+from utils.data_store import FOOD_TABLE, read_table
+from utils.food_recommend import FOOD_COLUMNS, format_recommendations
+
+# Throughput of format_recommendations against the previous row-by-row (iterrows) version,
+# at the result sizes of meal-planning exports with a raised k.
+# Usage: python -m utils.food_format_benchmark [rows per call, default 1000 2000 5000]
+ROW_COUNTS = [int(arg) for arg in sys.argv[1:]] or [1000, 2000, 5000]
+DEFICIENCIES = ['iron', 'calcium', 'vitamin_D']
+N_RUNS = 5
+
+
+def format_recommendations_iterrows(recommended_items, selected_deficiencies):
+    """The previous implementation: nested dicts row by row, then copied into lists."""
+    formatted_data = {}
+    for _, row in recommended_items.iterrows():
+        nutrient_values = {nutrient: row[nutrient] for nutrient in selected_deficiencies}
+        formatted_data.setdefault(row['main_category'], {}).setdefault(row['sub_category'], []).append({
+            "food_name": row['description'],
+            "nutrients": nutrient_values
+        })
+    return [
+        {"main_category": main_cat,
+         "sub_categories": [{"name": sub_cat, "foods": [dict(food) for food in foods]}
+                            for sub_cat, foods in sub_cats.items()]}
+        for main_cat, sub_cats in formatted_data.items()
+    ]
+
+
+def best_seconds(function, *args):
+    """Fastest of N_RUNS calls."""
+    timings = []
+    for _ in range(N_RUNS):
+        started = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+foods = read_table(FOOD_TABLE, columns=FOOD_COLUMNS)
+rng = np.random.default_rng(42)
+print(f"📊 {len(foods)} foods, deficiencies {', '.join(DEFICIENCIES)}, best of {N_RUNS}\n")
+
+for n_rows in ROW_COUNTS:
+    recommended_items = foods.iloc[rng.integers(0, len(foods), size=n_rows)]
+    same = format_recommendations(recommended_items, DEFICIENCIES) == \
+        format_recommendations_iterrows(recommended_items, DEFICIENCIES)
+    iterrows_seconds = best_seconds(format_recommendations_iterrows, recommended_items, DEFICIENCIES)
+    grouped_seconds = best_seconds(format_recommendations, recommended_items, DEFICIENCIES)
+    print(f"{n_rows:>6} rows: iterrows {iterrows_seconds * 1000:8.2f} ms  groupby {grouped_seconds * 1000:7.2f} ms  "
+          f"speed-up {iterrows_seconds / grouped_seconds:5.1f}x  same output: {same}")
@@ -1,6 +1,8 @@
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import re
+from utils.catalogue_stats import FOOD_STATS_PATH, catalogue_stats, save_stats
+from utils.data_store import FOOD_FEATURES_TABLE, FOOD_TABLE, write_table
 
 # Load data
 df = pd.read_excel("data/food_data.xlsx")
@@ -37,7 +39,9 @@ nutrients = ['calcium', 'potassium', 'zinc', 'vitamin_C', 'iron', 'magnesium', '
               'vitamin_E', 'thiamin', 'riboflavin', 'cholesterol', 'Niacin', 'vitamin_B_6', 'choline_total',
               'vitamin_A', 'vitamin_K', 'folate_total', 'vitamin_B_12', 'selenium', 'vitamin_D' ]
 
-df.to_csv("data/original/food.csv",index=False) # saving after column names have changed
+write_table(df, FOOD_TABLE) # saving after column names have changed
+# Categories and nutrient ranges (original units) for the food page
+save_stats(catalogue_stats(df, nutrients, ['main_category', 'sub_category']), FOOD_STATS_PATH)
 #print(df.columns)
 
 # Normalize nutrient data using MinMaxScaler
@@ -45,5 +49,5 @@ scaler = MinMaxScaler()
 df[nutrients] = scaler.fit_transform(df[nutrients])
 
 # Save the processed data
-df.to_csv("data/preprocessed/food.csv", index=False)
-print("✅ Data preprocessing complete! File saved as 'processed_food_data.csv'.")
+write_table(df, FOOD_FEATURES_TABLE)
+print(f"✅ Data preprocessing complete! File saved as '{FOOD_FEATURES_TABLE}'.")
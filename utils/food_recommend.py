@@ -1,17 +1,210 @@
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import MinMaxScaler
+import itertools
+import json
+import multiprocessing
+import os
 import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from utils.artifacts import artifact_signature, content_signature
+from utils.data_store import FOOD_FEATURES_TABLE, FOOD_TABLE, TableWriter, read_table, table_files
+
+# Nutrient features of the KNN model, in model column order
+NUTRIENTS = ['calcium', 'potassium', 'zinc', 'vitamin_C', 'iron', 'magnesium', 'phosphorus', 'sodium', 'copper',
+             'vitamin_E', 'thiamin', 'riboflavin', 'cholesterol', 'Niacin', 'vitamin_B_6', 'choline_total',
+             'vitamin_A', 'vitamin_K', 'folate_total', 'vitamin_B_12', 'selenium', 'vitamin_D']
+
+# Columns of the food catalogue used to build recommendations
+FOOD_COLUMNS = ['description', 'main_category', 'sub_category'] + NUTRIENTS
+
+KNN_MODEL_PATH = "models/knn_model.pkl"
+
+# Preferences restricted to foods of their own main_category. Each gets its own neighbour index
+# (CATEGORY_INDEX_PATH), so a Veg user gets a full top-k of Veg foods instead of the Veg share of
+# the global neighbours; any other preference searches the whole catalogue.
+CATEGORY_FILTERS = ['Veg']
+CATEGORY_INDEX_PATH = "models/knn_category_models.pkl"
+
+# Deficiencies offered by the food page, of which at most MAX_SELECTIONS can be selected.
+# food_train_model.py precomputes the recommendations of every such combination (and category
+# filter) into ANSWERS_PATH; anything else is answered by a live neighbour search.
+DEFICIENCY_OPTIONS = [
+    'vitamin_D', 'calcium',  'vitamin_C', 'iron', 'potassium',
+    'vitamin_B_6', 'vitamin_B_12', 'vitamin_A', 'riboflavin', 'vitamin_E', 'folate_total',
+    'vitamin_K', 'zinc', 'magnesium','sodium',  'thiamin', 'Niacin',  'selenium'
+]
+MAX_SELECTIONS = 3
+ANSWERS_PATH = "models/food_answers.npz"
+
+# Queries searched together by recommend_food_batch
+BATCH_CHUNK_SIZE = 4096
 
 def load_data():
-    """Load processed food data and trained KNN model."""
-    df = pd.read_csv("data/preprocessed/food.csv")
-    original_df = pd.read_csv("data/original/food.csv") #loading original data 
-    with open("models/knn_model.pkl", "rb") as model_file:
+    """Load processed food data and trained KNN model (only the columns used here)."""
+    df = read_table(FOOD_FEATURES_TABLE, columns=['main_category'])
+    original_df = read_table(FOOD_TABLE, columns=FOOD_COLUMNS) #loading original data 
+    with open(KNN_MODEL_PATH, "rb") as model_file:
         knn = pickle.load(model_file)
     return df, knn, original_df
 
 
+def load_category_indexes(path=CATEGORY_INDEX_PATH):
+    """Per-category neighbour indexes {category: {"rows", "knn"}}, empty if not trained yet."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "rb") as model_file:
+        return pickle.load(model_file)
+
+
+def model_artifact_paths():
+    """Food tables and KNN models the recommendations are computed from."""
+    return table_files(FOOD_FEATURES_TABLE) + table_files(FOOD_TABLE) + [KNN_MODEL_PATH, CATEGORY_INDEX_PATH]
+
+
+@dataclass
+class FoodArtifacts:
+    """
+    One generation of loaded artifacts. A reload builds a new instance and swaps it in with a
+    single assignment; a query takes one instance at the start and uses only that one, so its
+    neighbour rows always index the catalogue they were computed from.
+    """
+    df: pd.DataFrame
+    knn: object
+    original_df: pd.DataFrame
+    category_indexes: dict
+    answers: dict = None
+    formatted: dict = field(default_factory=dict)  # formatted answers, filled by cached_answer
+
+
+class FoodRecommender:
+    """
+    Keeps the food tables and the KNN model in memory for the lifetime of the server process,
+    so a recommendation costs one neighbour query. Artifacts are reloaded when their files change.
+    """
+
+    def __init__(self, answers_path=ANSWERS_PATH):
+        self.answers_path = answers_path  # None: always search live
+        self.artifacts = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.load_count = 0
+        self._signature = None
+        self._lock = threading.RLock()
+
+    # Fields of the current generation (None before the first load)
+    df = property(lambda self: None if self.artifacts is None else self.artifacts.df)
+    knn = property(lambda self: None if self.artifacts is None else self.artifacts.knn)
+    original_df = property(lambda self: None if self.artifacts is None else self.artifacts.original_df)
+    category_indexes = property(lambda self: {} if self.artifacts is None else self.artifacts.category_indexes)
+    answers = property(lambda self: None if self.artifacts is None else self.artifacts.answers)
+
+    def artifact_paths(self):
+        """Files whose modification triggers a reload."""
+        return model_artifact_paths() + ([self.answers_path] if self.answers_path else [])
+
+    def load(self):
+        """(Re)load the food tables and the KNN model from disk."""
+        with self._lock:
+            started = time.perf_counter()
+            signature = artifact_signature(self.artifact_paths())
+            df, knn, original_df = load_data()
+            answers = None
+            if self.answers_path:
+                answers = load_answer_table(content_signature(model_artifact_paths()), self.answers_path)
+            self.artifacts = FoodArtifacts(df, knn, original_df, load_category_indexes(), answers)
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.load_seconds = time.perf_counter() - started
+            self.load_count += 1
+            print(f"✅ Food recommender loaded in {self.load_seconds:.2f}s ({len(original_df)} foods).")
+
+    def ensure_loaded(self):
+        """Load on first use and hot-reload when an artifact file has changed."""
+        if self._signature is not None and artifact_signature(self.artifact_paths()) == self._signature:
+            return self
+        with self._lock:
+            if self._signature is None or artifact_signature(self.artifact_paths()) != self._signature:
+                self.load()
+        return self
+
+    def snapshot(self):
+        """The current artifact generation, (re)loaded first if needed."""
+        self.ensure_loaded()
+        return self.artifacts
+
+    def status(self):
+        """Load status for display and monitoring."""
+        return {
+            "loaded": self._signature is not None,
+            "foods": 0 if self.original_df is None else len(self.original_df),
+            "category_indexes": sorted(self.category_indexes),
+            "answers": 0 if self.answers is None else len(self.answers),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "load_count": self.load_count,
+        }
+
+    def cached_answer(self, deficiencies, category, artifacts=None):
+        """
+        Formatted recommendations from the answer table of a generation (default: the current one),
+        or None when the query is not in it.
+        Formatting happens once per deficiency order and category, later calls are a dict lookup.
+        """
+        artifacts = artifacts or self.snapshot()
+        key = (tuple(deficiencies), category_filter(category))
+        formatted = artifacts.formatted.get(key)
+        if formatted is None and artifacts.answers is not None and len(set(deficiencies)) == len(deficiencies):
+            rows = artifacts.answers.get(answer_key(deficiencies, category))
+            if rows is not None:
+                formatted = format_recommendations(artifacts.original_df.iloc[rows], list(deficiencies))
+                artifacts.formatted[key] = formatted
+        return formatted
+
+    def neighbour_rows(self, queries, category, artifacts=None):
+        """
+        Catalogue rows of the neighbours of each query, nearest first. The search runs without the
+        lock, on one generation, so sessions query in parallel.
+        Args:
+            queries (array): (queries x nutrients) deficiency vectors
+            category (str): food preference
+            artifacts (FoodArtifacts): generation to search (default: the current one)
+        Returns:
+            list: one array of rows of artifacts.original_df per query
+        """
+        artifacts = artifacts or self.snapshot()
+        category_index = artifacts.category_indexes.get(category_filter(category))
+        if category_index is not None:
+            _, indices = category_index["knn"].kneighbors(queries)
+            return list(category_index["rows"][indices])
+        # No index for the category: filter the global neighbours
+        _, indices = artifacts.knn.kneighbors(queries)
+        main_categories = artifacts.original_df['main_category'].to_numpy()
+        return [recommended_rows(row, len(artifacts.df), main_categories, category) for row in indices]
+
+    def data(self):
+        """(df, knn, original_df) of the current artifacts, as returned by load_data()."""
+        artifacts = self.snapshot()
+        return artifacts.df, artifacts.knn, artifacts.original_df
+
+
+_food_recommender = None
+_food_recommender_lock = threading.Lock()
+
+
+def get_food_recommender():
+    """Return the process-wide food recommender shared by every Streamlit session."""
+    global _food_recommender
+    if _food_recommender is None:
+        with _food_recommender_lock:
+            if _food_recommender is None:
+                _food_recommender = FoodRecommender()
+    return _food_recommender
+
+
 
 
 
@@ -24,67 +217,130 @@ def format_recommendations(recommended_items, selected_deficiencies):
     Returns:
         list: Formatted list of recommendations grouped by main and sub categories
     """
-    formatted_data = {}
+    if recommended_items.empty:
+        return []
 
-    # Iterate through each row in the DataFrame
-    for _, row in recommended_items.iterrows():
-        main_cat = row['main_category']
-        sub_cat = row['sub_category']
-        food_name = row['description']
-        nutrient_values = {nutrient: row[nutrient] for nutrient in selected_deficiencies}  # Extract deficiencies
+    # Food entries in row order, built from whole columns
+    nutrient_values = recommended_items[list(selected_deficiencies)].to_numpy().tolist()
+    foods = [{"food_name": food_name, "nutrients": dict(zip(selected_deficiencies, values))}
+             for food_name, values in zip(recommended_items['description'].tolist(), nutrient_values)]
 
-        # Create main category if it doesn't exist
-        if main_cat not in formatted_data:
-            formatted_data[main_cat] = {}
+    # (main, sub) category group of every row, numbered in order of first appearance
+    groups = recommended_items.groupby(['main_category', 'sub_category'], sort=False, dropna=False)
+    return category_tree(groups.ngroup().to_numpy(), recommended_items['main_category'].to_numpy(),
+                         recommended_items['sub_category'].to_numpy(), foods)
 
-        # Create sub category if it doesn't exist
-        if sub_cat not in formatted_data[main_cat]:
-            formatted_data[main_cat][sub_cat] = []
 
-        # Add food name and nutrients under the sub-category
-        formatted_data[main_cat][sub_cat].append({
-            "food_name": food_name,
-            "nutrients": nutrient_values
-        })
+def category_tree(codes, main_categories, sub_categories, foods):
+    """
+    Build the main category -> sub category -> foods tree directly.
+    Args:
+        codes (array): (main, sub) category group per row, numbered in order of first appearance
+        main_categories (array): main category per row
+        sub_categories (array): sub category per row
+        foods (list): food entry per row
+    Returns:
+        list: the formatted recommendations
+    """
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1]])
+    stops = np.r_[starts[1:], len(order)]
 
-    # Convert structured data into a list format
     formatted_list = []
-    for main_cat, sub_cats in formatted_data.items():
-        main_category = {
-            "main_category": main_cat,
-            "sub_categories": []
-        }
+    main_entries = {}
+    for start, stop in zip(starts, stops):
+        first = order[start]
+        main_category = main_entries.get(main_categories[first])
+        if main_category is None:
+            main_category = {"main_category": main_categories[first], "sub_categories": []}
+            main_entries[main_categories[first]] = main_category
+            formatted_list.append(main_category)
+        main_category["sub_categories"].append({
+            "name": sub_categories[first],
+            "foods": [foods[row] for row in order[start:stop]],
+        })
+
+    return formatted_list  # Ensure it returns a list of dictionaries
 
-        for sub_cat, foods in sub_cats.items():
-            sub_category = {
-                "name": sub_cat,
-                "foods": []  # List of food items
-            }
-            for food in foods:
-                sub_category["foods"].append({
-                    "food_name": food["food_name"],
-                    "nutrients": food["nutrients"]
-                })
 
-            main_category["sub_categories"].append(sub_category)
+def deficiency_query(deficiencies):
+    """Query vector: 1 for deficient nutrients, 0 for others."""
+    sample = np.zeros(len(NUTRIENTS))
+    for deficiency in deficiencies:
+        sample[NUTRIENTS.index(deficiency)] = 1
+    return sample
 
-        formatted_list.append(main_category)
 
-    return formatted_list  # Ensure it returns a list of dictionaries
+def category_filter(category):
+    """The category a preference restricts recommendations to, or None for the whole catalogue."""
+    return category if category in CATEGORY_FILTERS else None
 
 
-    
-    
+def recommended_rows(neighbour_rows, n_rows, main_categories, category):
+    """Catalogue rows of global neighbours, restricted to the preference's category after the search."""
+    rows = neighbour_rows % n_rows  # Ensure valid indices
+    if category_filter(category) is not None:
+        rows = rows[main_categories[rows] == category]
+    return rows
+
+
+def answer_key(deficiencies, category):
+    """Answer table key: the deficiency set in model column order and the category filter."""
+    return ",".join(sorted(set(deficiencies), key=NUTRIENTS.index)) + "|" + (category_filter(category) or "all")
+
+
+def build_answer_table(recommender, deficiencies=DEFICIENCY_OPTIONS, max_selections=MAX_SELECTIONS):
+    """
+    Recommended catalogue rows for every deficiency combination the food page can request.
+    Args:
+        recommender (FoodRecommender): loaded food tables and neighbour indexes
+        deficiencies (list): deficiencies offered by the page
+        max_selections (int): most deficiencies selectable at once
+    Returns:
+        dict: answer_key -> catalogue rows (combinations without a result are left out)
+    """
+    combinations = [combination for size in range(1, max_selections + 1)
+                    for combination in itertools.combinations(deficiencies, size)]
+    queries = np.array([deficiency_query(combination) for combination in combinations])
+    answers = {}
+    artifacts = recommender.snapshot()
+    # One neighbour search per category filter for all of them
+    for category in CATEGORY_FILTERS + [None]:
+        for combination, rows in zip(combinations, recommender.neighbour_rows(queries, category, artifacts)):
+            if len(rows):
+                answers[answer_key(combination, category)] = rows
+    return answers
+
+
+def save_answer_table(answers, signature, path=ANSWERS_PATH):
+    """Save the answer table (keys, row offsets, rows) with the content signature of its source artifacts."""
+    keys = list(answers)
+    offsets = np.cumsum([0] + [len(answers[key]) for key in keys])
+    rows = np.concatenate([answers[key] for key in keys]).astype(np.int32) if keys else np.empty(0, np.int32)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, keys=np.array(keys), offsets=offsets, rows=rows, signature=json.dumps(signature))
+    os.replace(tmp_path, path)
+
+
+def load_answer_table(signature, path=ANSWERS_PATH):
+    """Answer table, or None when it is missing or was computed from other artifacts."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as stored:
+        if str(stored["signature"]) != json.dumps(signature):
+            print("⚠️ Food answer table is out of date, using live search (re-run food_train_model).")
+            return None
+        keys, offsets, rows = stored["keys"], stored["offsets"], stored["rows"]
+    return {str(key): rows[start:stop] for key, start, stop in zip(keys, offsets[:-1], offsets[1:])}
+
 
 def recommend_food(deficiencies, category=None):
     #Recommend food items based on a user's nutrient deficiencies, with optional category filtering.
-    df, knn,original_df = load_data()
+    recommender = get_food_recommender()
+    artifacts = recommender.snapshot()  # the catalogue the rows below index
     print("from recommend_food: deficiencies: ", deficiencies, "category: ", category)
     selected_deficiencies=deficiencies
-    # Define nutrients inside the function
-    nutrients = ['calcium', 'potassium', 'zinc', 'vitamin_C', 'iron', 'magnesium', 'phosphorus', 'sodium', 'copper',
-                 'vitamin_E', 'thiamin', 'riboflavin', 'cholesterol', 'Niacin', 'vitamin_B_6', 'choline_total',
-                 'vitamin_A', 'vitamin_K', 'folate_total', 'vitamin_B_12', 'selenium', 'vitamin_D']
+    nutrients = NUTRIENTS
     
     if not isinstance(deficiencies, list):
         return "Invalid input. Provide a list of deficiencies."
@@ -93,36 +349,146 @@ def recommend_food(deficiencies, category=None):
     invalid_nutrients = [d for d in deficiencies if d not in nutrients]
     if invalid_nutrients:
         return f"Invalid deficiencies: {', '.join(invalid_nutrients)}. Choose from: {', '.join(nutrients)}"
-       
-    # Create a query vector: 1 for deficient nutrients, 0 for others
-    sample = np.zeros(len(nutrients))
-    for deficiency in deficiencies:
-        sample[nutrients.index(deficiency)] = 1
-    
-    # Use KNN to get recommendations
-    distances, indices = knn.kneighbors([sample])
-    
-    # Extract recommendations from the full dataset first
-    #recommended_items = df.iloc[indices[0] % len(df)]  # Ensure valid indices
-    
-    #getting original values
-    #original_df= df
-    #scaler = MinMaxScaler()
-    #original_df[nutrients]= scaler.inverse_transform(df[nutrients])
-
-   # Extract recommendations from the original dataset first
-    #recommended_items = original_df.iloc[indices[0]][['description','main_category','sub_category']+ deficiencies] # Ensure valid indices
-    recommended_items = original_df.iloc[indices[0] % len(df)] 
-    #print(recommended_items)
-    #print(recommended_items2)
-    #print('columns in orignal df',original_df.columns)
-
-    # If category is 'Veg', filter the recommendations
-    if category == 'Veg':
-        recommended_items = recommended_items[recommended_items['main_category'] == category]
+
+    # Every combination the page offers is precomputed by food_train_model.py
+    cached = recommender.cached_answer(deficiencies, category, artifacts)
+    if cached is not None:
+        return cached
+
+    # Use KNN to get recommendations (the category's own index when it has one)
+    rows = recommender.neighbour_rows([deficiency_query(deficiencies)], category, artifacts)[0]
+    recommended_items = artifacts.original_df.iloc[rows]
     
     if recommended_items.empty:
         return {"error": f"No valid food recommendations available for the selected category: {category}"}
     
     formatted_recommendations = format_recommendations(recommended_items,selected_deficiencies)
-    return formatted_recommendations 
\ No newline at end of file
+    return formatted_recommendations
+
+
+def batch_queries(queries):
+    """
+    Query matrix and per-row deficiencies of a batch.
+    Args:
+        queries: (N x 22) matrix / DataFrame with the NUTRIENTS columns, or a list of deficiency lists
+    Returns:
+        tuple: (N x 22 query matrix, list of deficiencies per row)
+    """
+    if isinstance(queries, pd.DataFrame):
+        queries = queries[NUTRIENTS].to_numpy(dtype=float)
+    if not isinstance(queries, np.ndarray):
+        queries = list(queries)  # a generator can only be read once
+        if any(isinstance(row, str) or np.ndim(row) == 0 for row in queries):
+            raise ValueError("Expected one row per query (a list of deficiencies or of nutrient values), "
+                             "got a flat list")
+    if not isinstance(queries, np.ndarray) and all(isinstance(item, str) for row in queries for item in row):
+        invalid_nutrients = sorted({d for row in queries for d in row if d not in NUTRIENTS})
+        if invalid_nutrients:
+            raise ValueError(f"Invalid deficiencies: {', '.join(invalid_nutrients)}. "
+                             f"Choose from: {', '.join(NUTRIENTS)}")
+        deficiencies = [list(row) for row in queries]
+        matrix = np.zeros((len(deficiencies), len(NUTRIENTS)))
+        for i, row in enumerate(deficiencies):
+            matrix[i] = deficiency_query(row)
+        return matrix, deficiencies
+    matrix = np.asarray(queries, dtype=float)
+    if matrix.ndim != 2 or matrix.shape[1] != len(NUTRIENTS):
+        raise ValueError(f"Query matrix must be N x {len(NUTRIENTS)} (one column per nutrient), "
+                         f"got shape {matrix.shape}")
+    # Matrix rows: the nutrients with a non-zero query value are the deficiencies shown
+    return matrix, [[NUTRIENTS[j] for j in np.flatnonzero(row)] for row in matrix]
+
+
+def _batch_chunk(matrix, deficiencies, categories, as_table):
+    """
+    Recommendations for one chunk of a batch: one neighbour search per category filter over the
+    chunk's distinct queries. Returns the formatted results, or a long table when as_table.
+    """
+    recommender = get_food_recommender()
+    artifacts = recommender.snapshot()  # one generation for the whole chunk
+    original_df = artifacts.original_df
+    keys = [(query.tobytes(), tuple(row), category_filter(category))
+            for query, row, category in zip(matrix, deficiencies, categories)]
+    rows_by_key = {}
+    for category in set(key[2] for key in keys):
+        unique = list({key: i for i, key in enumerate(keys) if key[2] == category}.values())
+        for i, rows in zip(unique, recommender.neighbour_rows(matrix[unique], category, artifacts)):
+            rows_by_key[keys[i]] = rows
+
+    if as_table:
+        rows = [rows_by_key[key] for key in keys]
+        table = original_df.iloc[np.concatenate(rows) if rows else []][FOOD_COLUMNS].reset_index(drop=True)
+        table.insert(0, "rank", np.concatenate([np.arange(len(row)) for row in rows]) if rows else [])
+        table.insert(0, "query", np.repeat(np.arange(len(rows)), [len(row) for row in rows]))
+        return table
+
+    # Formatted like recommend_food, from catalogue columns extracted once per chunk
+    names = original_df['description'].to_numpy()
+    main_categories = original_df['main_category'].to_numpy()
+    sub_categories = original_df['sub_category'].to_numpy()
+    nutrient_values = original_df[NUTRIENTS].to_numpy()
+    group_codes = original_df.groupby(['main_category', 'sub_category'], sort=False, dropna=False).ngroup().to_numpy()
+    results = {}
+    for key, category in zip(keys, categories):
+        if key in results:
+            continue
+        rows, selected_deficiencies = rows_by_key[key], list(key[1])
+        if len(rows) == 0:
+            results[key] = {"error": f"No valid food recommendations available for the selected category: {category}"}
+            continue
+        values = nutrient_values[np.ix_(rows, [NUTRIENTS.index(d) for d in selected_deficiencies])].tolist()
+        foods = [{"food_name": food_name, "nutrients": dict(zip(selected_deficiencies, row_values))}
+                 for food_name, row_values in zip(names[rows].tolist(), values)]
+        # Renumber the catalogue groups in order of first appearance among these rows
+        _, first, inverse = np.unique(group_codes[rows], return_index=True, return_inverse=True)
+        codes = np.argsort(np.argsort(first))[inverse]
+        results[key] = category_tree(codes, main_categories[rows], sub_categories[rows], foods)
+    return [results[key] for key in keys]
+
+
+def recommend_food_batch(queries, categories=None, output_path=None, chunk_size=BATCH_CHUNK_SIZE, workers=1,
+                         query_ids=None):
+    """
+    Recommend food items for many deficiency profiles at once (e.g. a screened cohort).
+    Args:
+        queries: (N x 22) matrix / DataFrame with the NUTRIENTS columns, or a list of deficiency lists
+        categories: one food preference for every row, or a list with one per row
+        output_path (str): stream the results to this Parquet file instead of returning them
+        chunk_size (int): queries searched together (bounds memory)
+        workers (int): processes searching chunks in parallel (1: in this process)
+        query_ids (list): values of the output's "query" column (default: row positions)
+    Returns:
+        list: formatted recommendations per row (as recommend_food returns them), or the number of
+        rows written to output_path (one row per query and recommended food, nearest first)
+    """
+    matrix, deficiencies = batch_queries(queries)
+    if categories is None or isinstance(categories, str):
+        categories = [categories] * len(matrix)
+    if len(categories) != len(matrix):
+        raise ValueError(f"Got {len(categories)} categories for {len(matrix)} queries")
+    as_table = output_path is not None
+    chunks = [(matrix[start:start + chunk_size], deficiencies[start:start + chunk_size],
+               categories[start:start + chunk_size], as_table) for start in range(0, len(matrix), chunk_size)]
+
+    pool = None
+    if workers > 1:
+        # Every worker loads its own recommender once and searches whole chunks
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        results = pool.map(_batch_chunk, *zip(*chunks)) if chunks else []
+    else:
+        results = (_batch_chunk(*chunk) for chunk in chunks)
+
+    try:
+        if not as_table:
+            return [result for chunk_results in results for result in chunk_results]
+        offset = 0
+        with TableWriter(output_path) as writer:
+            for table in results:  # chunks arrive in order and are written as they complete
+                positions = table["query"].to_numpy() + offset
+                table["query"] = positions if query_ids is None else np.asarray(query_ids)[positions]
+                offset += chunk_size
+                writer.write(table)
+        return writer.rows
+    finally:
+        if pool is not None:
+            pool.shutdown()
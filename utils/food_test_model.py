@@ -1,4 +1,4 @@
-from food_recommend import recommend_food
+from utils.food_recommend import recommend_food
 
 
 # Test the model with multiple deficiencies and category filtering
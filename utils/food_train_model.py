@@ -1,9 +1,19 @@
-import pandas as pd
+import numpy as np
 from sklearn.neighbors import NearestNeighbors
+import os
 import pickle
+from utils.artifacts import content_signature
+from utils.data_store import FOOD_FEATURES_TABLE, read_table
+from utils.food_recommend import (CATEGORY_FILTERS, CATEGORY_INDEX_PATH, KNN_MODEL_PATH, FoodRecommender,
+                                  build_answer_table, model_artifact_paths, save_answer_table)
 
-# Load processed food data
-df = pd.read_csv("data/preprocessed/food.csv")
+
+def save_model(model, path):
+    """Pickle a model atomically: a running app hot-reloads it when the file changes."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as model_file:
+        pickle.dump(model, model_file)
+    os.replace(tmp_path, path)
 
 
 # Define features (nutrient values)
@@ -11,6 +21,8 @@ nutrients = ['calcium', 'potassium', 'zinc', 'vitamin_C', 'iron', 'magnesium', '
               'vitamin_E', 'thiamin', 'riboflavin', 'cholesterol', 'Niacin', 'vitamin_B_6', 'choline_total',
               'vitamin_A', 'vitamin_K', 'folate_total', 'vitamin_B_12', 'selenium', 'vitamin_D' ]
 
+# Load processed food data (feature columns only)
+df = read_table(FOOD_FEATURES_TABLE, columns=['main_category'] + nutrients)
 
 # Prepare the feature matrix for KNN (using nutrients only)
 X = df[nutrients]
@@ -20,7 +32,27 @@ knn = NearestNeighbors(n_neighbors=40, metric='euclidean')
 knn.fit(X)
 
 # Save the trained model
-with open("models/knn_model.pkl", "wb") as model_file:
-    pickle.dump(knn, model_file)
+save_model(knn, KNN_MODEL_PATH)
 
 print("✅ KNN model trained and saved as 'knn_model.pkl'.")
+
+# One KNN model per restricted category, fitted on that category's foods only
+category_indexes = {}
+for category in CATEGORY_FILTERS:
+    rows = np.flatnonzero(df['main_category'].to_numpy() == category)
+    if len(rows) == 0:
+        continue
+    category_knn = NearestNeighbors(n_neighbors=min(40, len(rows)), metric='euclidean')
+    category_knn.fit(X.iloc[rows])
+    category_indexes[category] = {"rows": rows, "knn": category_knn}
+
+save_model(category_indexes, CATEGORY_INDEX_PATH)
+
+print(f"✅ Category KNN models ({', '.join(category_indexes)}) saved as 'knn_category_models.pkl'.")
+
+# Precompute the recommendations of every deficiency combination the food page can request
+recommender = FoodRecommender(answers_path=None)
+recommender.load()
+answers = build_answer_table(recommender)
+save_answer_table(answers, content_signature(model_artifact_paths()))
+print(f"✅ {len(answers)} precomputed food recommendations saved as 'food_answers.npz'.")
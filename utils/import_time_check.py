@@ -0,0 +1,51 @@
+import argparse
+import subprocess
+import sys
+
+# Import-time budget of the modules the Streamlit pages import before they render.
+# Every measurement runs in a fresh interpreter (python -X importtime); the best of N_RUNS is
+# compared with the budget, so a cold disk cache or a busy machine does not fail the check.
+# Exits with status 1 when a module is over budget or pulls in one of HEAVY_MODULES.
+IMPORT_BUDGETS = {
+    "utils.recipes_recommend": 1.0,  # seconds; numpy + pandas are most of it
+}
+HEAVY_MODULES = ("torch", "sentence_transformers", "sklearn", "transformers")
+N_RUNS = 5
+
+
+def import_seconds(module):
+    """Cumulative import time of module in a fresh interpreter, and the heavy modules it loaded."""
+    code = (f"import sys, {module}\n"
+            f"print(','.join(name for name in {HEAVY_MODULES!r} if name in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    cumulative_us = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    heavy = [name for name in result.stdout.strip().split(",") if name]
+    return cumulative_us / 1e6, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when page imports get slower than their budget.")
+    parser.add_argument("--runs", type=int, default=N_RUNS, help="fresh interpreters per module")
+    args = parser.parse_args()
+
+    failed = False
+    for module, budget in IMPORT_BUDGETS.items():
+        runs = [import_seconds(module) for _ in range(args.runs)]
+        seconds = min(run[0] for run in runs)
+        heavy = runs[0][1]
+        ok = seconds <= budget and not heavy
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {module}: {seconds:.3f}s (budget {budget:.2f}s)")
+        if heavy:
+            print(f"   imports {', '.join(heavy)} at import time")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
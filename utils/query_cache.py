@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_ingredient(ingredient):
+    """Lower-case and collapse whitespace so equivalent selections share a key."""
+    return " ".join(str(ingredient).lower().split())
+
+
+def query_key(ingredients):
+    """Cache key of an ingredient selection: the sorted, normalised ingredient set."""
+    return tuple(sorted({normalize_ingredient(ingredient) for ingredient in ingredients}))
+
+
+def query_text(key):
+    """Text encoded for a key, so a key always maps to the same embedding."""
+    return " ".join(key)
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded LRU cache of query embeddings keyed by query_key().
+    Optionally persisted to an .npz file so a restart keeps the warm set; the file
+    is ignored when it was written for a different model (fingerprint mismatch).
+    """
+
+    def __init__(self, max_size=1024, path=None, fingerprint=None):
+        self.max_size = max_size
+        self.path = path
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached embedding for key, or None. Counts hits and misses."""
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, key, embedding):
+        with self._lock:
+            self._entries[key] = np.asarray(embedding, dtype=np.float32)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def save(self):
+        """Write the cache to self.path (least recently used first)."""
+        if not self.path:
+            return
+        with self._lock:
+            keys = list(self._entries)
+            embeddings = np.stack([self._entries[key] for key in keys]) if keys else np.empty((0, 0), np.float32)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp.npz"
+        np.savez(tmp_path, keys=json.dumps([list(key) for key in keys]), embeddings=embeddings,
+                 fingerprint=str(self.fingerprint))
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Restore entries from self.path if it exists and matches the current fingerprint."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with np.load(self.path) as data:
+            if str(data["fingerprint"]) != str(self.fingerprint):
+                return 0
+            keys = json.loads(str(data["keys"]))
+            embeddings = data["embeddings"]
+        for key, embedding in zip(keys, embeddings):
+            self.put(tuple(key), embedding)
+        return len(keys)
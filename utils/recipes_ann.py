@@ -0,0 +1,153 @@
+import numpy as np
+
+from utils.recipes_embeddings import normalize_rows
+from utils.recipes_scoring import top_k_indices
+
+# Approximate nearest-neighbour index for the recipe embedding matrix.
+# IVF (inverted file): a spherical k-means coarse quantiser splits the rows into
+# n_lists cells; a query only scores the rows of its n_probe closest cells.
+# One index is built per diet partition, with rows relative to the partition start.
+DEFAULT_N_PROBE = 8
+
+# Evaluation queries of the report scripts (see noisy_queries)
+REPORT_QUERIES = 200
+REPORT_NOISE = 0.05
+
+
+def ann_file(partition):
+    """File name of the index of one diet partition."""
+    return f"ann_ivf_{partition}.npz"
+
+
+def _assign(embeddings, centroids, chunk_size=65536):
+    """Closest centroid (by cosine) for every row, computed in chunks."""
+    assignments = np.empty(len(embeddings), dtype=np.int32)
+    for start in range(0, len(embeddings), chunk_size):
+        chunk = np.asarray(embeddings[start:start + chunk_size], dtype=np.float32)
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class IVFIndex:
+    """Inverted-file index over L2-normalised vectors, CPU only."""
+
+    def __init__(self, centroids, list_offsets, list_rows):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, embeddings, n_lists=None, n_iter=20, sample_size=50000, seed=0):
+        """
+        Train the coarse quantiser and bucket every row.
+        Args:
+            embeddings (array): L2-normalised matrix (rows x dim)
+            n_lists (int): number of cells, defaults to sqrt(rows)
+            n_iter (int): k-means iterations
+            sample_size (int): rows used to train the centroids
+            seed (int): random seed
+        Returns:
+            IVFIndex: the built index
+        """
+        n_rows = len(embeddings)
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_rows))
+        n_lists = max(1, min(n_lists, n_rows))
+        rng = np.random.default_rng(seed)
+
+        sample_rows = np.sort(rng.choice(n_rows, size=min(sample_size, n_rows), replace=False))
+        sample = np.asarray(embeddings[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        # Spherical k-means: assign by cosine, re-normalise the cell means
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty cells with random sample rows
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        assignments = _assign(embeddings, centroids)
+        list_rows = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, list_offsets, list_rows)
+
+    def candidates(self, query, n_probe=DEFAULT_N_PROBE):
+        """Rows stored in the n_probe cells closest to the query."""
+        cells = top_k_indices(self.centroids @ query, n_probe)
+        return np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in cells])
+
+    def search(self, query, embeddings, k, n_probe=DEFAULT_N_PROBE, row_mask=None):
+        """
+        Approximate top-k rows by cosine similarity.
+        Args:
+            query (array): L2-normalised query vector
+            embeddings (array): the matrix the index was built on
+            k (int): number of rows to return
+            n_probe (int): number of cells to scan
+            row_mask (array): optional boolean mask of allowed rows
+        Returns:
+            tuple: (row indices, similarity scores), best first
+        """
+        rows = self.candidates(query, n_probe)
+        if row_mask is not None:
+            rows = rows[row_mask[rows]]
+        rows = np.sort(rows)  # sequential reads from the memory-mapped matrix
+        scores = np.asarray(embeddings[rows], dtype=np.float32) @ query
+        top = top_k_indices(scores, k)
+        return rows[top], scores[top]
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, list_offsets=self.list_offsets, list_rows=self.list_rows)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["centroids"], data["list_offsets"], data["list_rows"])
+
+
+def exact_search(query, embeddings, k, row_mask=None):
+    """Brute-force top-k rows by cosine similarity, the reference for the index."""
+    if row_mask is None:
+        rows = np.arange(len(embeddings))
+        scores = np.asarray(embeddings, dtype=np.float32) @ query
+    else:
+        rows = np.flatnonzero(row_mask)
+        scores = np.asarray(embeddings[rows], dtype=np.float32) @ query
+    top = top_k_indices(scores, k)
+    return rows[top], scores[top]
+
+
+def recall_at_k(approx_rows, exact_rows):
+    """Fraction of the exact top-k found by the approximate search."""
+    if len(exact_rows) == 0:
+        return 1.0
+    return len(np.intersect1d(approx_rows, exact_rows)) / len(exact_rows)
+
+
+def noisy_queries(embeddings, n=REPORT_QUERIES, noise=REPORT_NOISE, rng=None):
+    """
+    Evaluation queries: random rows of embeddings with gaussian noise, renormalised, so they are
+    close to indexed recipes without being exact copies of them.
+    Args:
+        embeddings (array): matrix to sample from
+        n (int): number of queries (at most one per row)
+        noise (float): standard deviation of the noise per dimension
+        rng (Generator): random generator (default: seeded, so reports are reproducible)
+    Returns:
+        array: (queries x dim) L2-normalised queries
+    """
+    rng = np.random.default_rng(42) if rng is None else rng
+    rows = rng.choice(len(embeddings), size=min(n, len(embeddings)), replace=False)
+    return normalize_rows(np.asarray(embeddings[rows]) + rng.normal(scale=noise, size=(len(rows), embeddings.shape[1])))
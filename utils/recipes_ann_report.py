@@ -0,0 +1,36 @@
+import time
+
+import numpy as np
+
+from utils.recipes_ann import IVFIndex, ann_file, exact_search, noisy_queries, recall_at_k
+from utils.recipes_embeddings import artifact_path, load_embeddings, load_partitions
+
+# Recall@50 of the IVF index against the exact (brute-force) search, on noisy_queries().
+K = 50
+N_PROBES = [1, 2, 4, 8, 16, 32]
+
+df, embeddings, _ = load_embeddings()
+partitions = load_partitions()
+queries = noisy_queries(embeddings)
+
+print(f"📊 {len(embeddings)} recipes, {len(queries)} queries, k={K}\n")
+
+for label, (start, stop) in partitions.items():
+    ann_index = IVFIndex.load(artifact_path(ann_file(label)))
+    partition_embeddings = embeddings[start:stop]
+    print(f"[{label}] {stop - start} recipes, {ann_index.n_lists} IVF lists")
+
+    started = time.perf_counter()
+    exact_results = [exact_search(query, partition_embeddings, K)[0] for query in queries]
+    exact_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    print(f"[{label}] exact: {exact_ms:.2f} ms/query")
+
+    for n_probe in N_PROBES:
+        if n_probe > ann_index.n_lists:
+            break
+        started = time.perf_counter()
+        approx_results = [ann_index.search(query, partition_embeddings, K, n_probe=n_probe)[0] for query in queries]
+        approx_ms = (time.perf_counter() - started) * 1000 / len(queries)
+        recall = np.mean([recall_at_k(a, e) for a, e in zip(approx_results, exact_results)])
+        print(f"[{label}] n_probe={n_probe:>3}: recall@{K}={recall:.3f}  {approx_ms:.2f} ms/query")
+    print()
@@ -0,0 +1,113 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.recipes_lists import as_list
+
+# Define non-vegetarian keywords
+non_veg_keywords = set([
+    # Meat & Poultry
+    "chicken", "beef", "pork", "mutton", "lamb", "turkey", "duck", "quail", "goat", "veal",
+    "rabbit", "boar", "venison", "bison", "kangaroo", "goose", "pheasant", "pigeon", "elk",
+
+    # Processed Meat Products
+    "bacon", "ham", "sausage", "pepperoni", "salami", "chorizo", "pastrami", "prosciutto",
+    "mortadella", "hot dog", "jerky", "liverwurst", "blood sausage", "scrapple",
+
+    # Seafood
+    "fish", "tuna", "salmon", "trout", "cod", "haddock", "mackerel", "sardine", "anchovy",
+    "herring", "catfish", "bass", "snapper", "grouper", "halibut", "swordfish", "mahi mahi",
+    "flounder", "eel", "shark", "sturgeon", "tilapia", "tuna steaks", "swordfish steaks",
+
+    # Shellfish
+    "shrimp", "prawns", "crab", "lobster", "crawfish", "squid", "octopus", "scallops",
+    "mussels", "clams", "oysters", "abalone", "conch",
+
+    # Animal-Based Ingredients
+    "egg", "eggs", "gelatin", "lard", "suet", "tallow", "bone broth", "fish sauce", "oyster sauce",
+    "shrimp paste", "anchovy paste", "worcestershire sauce", "caviar", "roe", "squid ink",
+
+    # Organ Meats (Offal)
+    "liver", "kidney", "heart", "brain", "tripe", "sweetbreads", "tongue", "gizzards"
+])
+
+# Function to classify recipes
+def classify_recipe(row):
+    """
+    Classifies a recipe as 'Vegetarian' or 'Non-Vegetarian' based on:
+    - `RecipeIngredientParts`
+    - `RecipeCategory`
+    """
+    # Extract ingredient list
+    ingredients = str(row["RecipeIngredientParts"]).lower().replace('"', '').replace("c(", "").replace(")", "")
+    ingredient_list = [ing.strip() for ing in ingredients.split(",")]
+
+    # Extract category list
+    categories = str(row["RecipeCategory"]).lower().replace('"', '').replace("c(", "").replace(")", "")
+    category_list = [cat.strip() for cat in categories.split(",")]
+
+    # Extract and clean keywords list
+    keywords = str(row["Keywords"]).lower().replace('"', '').replace("c(", "").replace(")", "")
+    keyword_list = [kw.strip() for kw in keywords.split(",")]
+
+    # Extract recipe name
+    recipe_name = str(row["Name"]).lower()
+
+    # Combine all text sources to check for non-veg keywords
+    all_text = ingredient_list + category_list + keyword_list + [recipe_name]
+
+    # Check if any non-vegetarian keyword is found
+    if any(any(non_veg in item for non_veg in non_veg_keywords) for item in all_text):
+        return "Non-Veg"
+
+    return "Veg"
+
+
+# Vectorised classifier: the list fields of every recipe (parsed by utils/recipes_lists.py) are
+# concatenated, one item per line, and searched with a single compiled regex. The keywords are
+# folded into a trie-shaped pattern, so at each position the regex follows shared prefixes instead
+# of trying ~120 alternatives one by one. A keyword can never match across two items because none
+# contains a newline, so the decision is the same as classify_recipe's "any keyword in any item".
+TEXT_FIELDS = ["RecipeIngredientParts", "RecipeCategory", "Keywords"]
+
+
+def keyword_pattern(keywords):
+    """Compile keywords into one trie-shaped regex that prefers the longest keyword."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end of a keyword
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if "" in node else pattern
+
+    return re.compile(build(trie))
+
+
+NON_VEG_PATTERN = keyword_pattern(non_veg_keywords)
+
+
+def recipe_search_text(df):
+    """Ingredient, category and keyword items plus the name, one per line, per recipe."""
+    text = df["Name"].astype(str)
+    for field in reversed(TEXT_FIELDS):
+        text = df[field].map(lambda items: "\n".join(as_list(items))) + "\n" + text
+    return text.str.lower()
+
+
+def classify_recipes(df, pattern=NON_VEG_PATTERN):
+    """
+    Classify every recipe of df (list columns already parsed) as 'Veg' or 'Non-Veg' in one pass.
+    Returns:
+        tuple: (DietaryCategory Series, NonVegKeyword Series with the matched keyword, NaN for Veg)
+    """
+    keywords = recipe_search_text(df).str.extract(f"({pattern.pattern})", expand=False)
+    categories = pd.Series(np.where(keywords.notna(), "Non-Veg", "Veg"), index=df.index)
+    return categories, keywords
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import swap_directory
+from utils.data_store import table_columns
+from utils.recipes_ann import IVFIndex, ann_file
+from utils.recipes_embeddings import (EMBEDDING_DIR, META_FILE, artifact_path, load_embeddings, load_manifest,
+                                      normalize_rows, save_embeddings)
+from utils.recipes_lists import as_list
+from utils.recipes_quantize import QuantizedMatrix
+
+# Incremental, resumable embedding build:
+#   - every recipe gets a content hash of the text that is encoded
+#   - recipes whose hash is already in the current store reuse their embedding
+#   - new texts are encoded in batches; every CHECKPOINT_SIZE texts are written to
+#     CHECKPOINT_DIR, so a killed run resumes where it stopped
+#   - the new store is written to a staging directory and swapped in at the end
+CHECKPOINT_DIR = "data/embeddings/.build"
+CHECKPOINT_SIZE = 2048
+ENCODE_BATCH_SIZE = 64
+HASH_COLUMN = "ContentHash"
+TEXT_COLUMN = "RecipeIngredientParts"
+
+# Parallel encoding: every checkpoint chunk is split into shards of SHARD_SIZE texts that are
+# encoded by a pool of worker processes, each with its own model copy and torch thread budget.
+SHARD_SIZE = 256
+
+
+def recipe_text(ingredient_parts):
+    """Text encoded for one recipe: its ingredient list, comma separated."""
+    return ", ".join(as_list(ingredient_parts))
+
+
+def content_hash(text):
+    """Stable 63-bit hash of an encoded text (fits an int64 column)."""
+    digest = hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+
+def previous_embeddings(embedding_dir, model_name):
+    """
+    Embeddings of the current store by content hash.
+    Returns:
+        tuple: (Series hash -> row, embedding matrix); empty when there is nothing reusable
+    """
+    empty = pd.Series(dtype=np.int64)
+    try:
+        manifest = load_manifest(embedding_dir)
+        meta_path = artifact_path(META_FILE, embedding_dir)
+        if manifest.get("model") != model_name or HASH_COLUMN not in table_columns(meta_path):
+            return empty, None
+        meta_df, embeddings, _ = load_embeddings(embedding_dir, columns=[HASH_COLUMN])
+    except FileNotFoundError:
+        return empty, None
+    rows = pd.Series(np.arange(len(meta_df)), index=meta_df[HASH_COLUMN].to_numpy(dtype=np.int64))
+    return rows[~rows.index.duplicated()], embeddings
+
+
+def _plan_digest(hashes, model_name):
+    digest = hashlib.blake2b(model_name.encode("utf-8"), digest_size=16)
+    digest.update(np.asarray(hashes, dtype=np.int64).tobytes())
+    return digest.hexdigest()
+
+
+def _checkpoint_path(checkpoint_dir, chunk):
+    return os.path.join(checkpoint_dir, f"chunk_{chunk:05d}.npy")
+
+
+def encode_with_checkpoints(texts, hashes, encode, model_name, checkpoint_dir=CHECKPOINT_DIR,
+                            checkpoint_size=CHECKPOINT_SIZE):
+    """
+    Encode texts in checkpointed chunks.
+    Args:
+        texts (list): texts to encode
+        hashes (list): content hash of every text (identifies the build plan)
+        encode (callable): list of texts -> embedding matrix
+        model_name (str): sentence model name (part of the build plan)
+        checkpoint_dir (str): where finished chunks are kept until the build completes
+        checkpoint_size (int): texts per chunk
+    Returns:
+        array: embeddings in the order of texts
+    """
+    plan = {"model": model_name, "texts": len(texts), "checkpoint_size": checkpoint_size,
+            "digest": _plan_digest(hashes, model_name)}
+    plan_path = os.path.join(checkpoint_dir, "plan.json")
+    if os.path.exists(plan_path):
+        with open(plan_path) as plan_file:
+            if json.load(plan_file) != plan:
+                print("⚠️ Checkpoints belong to a different build, starting over.")
+                shutil.rmtree(checkpoint_dir)
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    with open(plan_path, "w") as plan_file:
+        json.dump(plan, plan_file)
+
+    chunks = []
+    num_chunks = (len(texts) + checkpoint_size - 1) // checkpoint_size
+    for chunk in range(num_chunks):
+        path = _checkpoint_path(checkpoint_dir, chunk)
+        if os.path.exists(path):
+            print(f"Resuming chunk {chunk + 1}/{num_chunks} from checkpoint")
+            chunks.append(np.load(path))
+            continue
+
+        start = chunk * checkpoint_size
+        embeddings = np.asarray(encode(texts[start:start + checkpoint_size]), dtype=np.float32)
+        tmp_path = path + ".tmp.npy"
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, path)
+        chunks.append(embeddings)
+        print(f"Encoded chunk {chunk + 1}/{num_chunks}, texts {start} to {start + len(embeddings) - 1}")
+
+    return np.concatenate(chunks) if chunks else np.empty((0, 0), dtype=np.float32)
+
+
+_worker_model = None
+
+
+def _init_encode_worker(model_name, threads):
+    """Process pool initializer: limit torch threads and load this worker's model."""
+    global _worker_model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_shard(texts):
+    return np.asarray(_worker_model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True),
+                      dtype=np.float32)
+
+
+def default_threads_per_worker(workers):
+    """Split the machine's cores evenly between the workers."""
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+class ParallelEncoder:
+    """
+    Encode callable for build_recipe_embeddings() that shards texts across worker processes.
+    Shards are returned in submission order, so the merged matrix keeps the order of the texts.
+    Use as a context manager so the pool is shut down after the build.
+    """
+
+    def __init__(self, model_name, workers, threads_per_worker=None, shard_size=SHARD_SIZE):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+        self.shard_size = shard_size
+        # spawn: forking a process that already runs torch threads can deadlock
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_encode_worker,
+                                         initargs=(model_name, self.threads_per_worker))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __call__(self, texts):
+        texts = list(texts)
+        shards = [texts[start:start + self.shard_size] for start in range(0, len(texts), self.shard_size)]
+        return np.concatenate(list(self._pool.map(_encode_shard, shards)))
+
+
+def write_store(df, embeddings, embedding_dir, model_name):
+    """Write the embedding store with its quantised copies and per-partition ANN indexes."""
+    df, embeddings, partitions = save_embeddings(df, embeddings, embedding_dir, model_name=model_name)
+
+    for storage in ["int8", "float16"]:
+        quantized = QuantizedMatrix.from_float(embeddings, storage)
+        quantized.save(embedding_dir, storage)
+        print(f"✅ {storage} embeddings saved ({quantized.nbytes / 2**20:.1f} MiB vs {embeddings.nbytes / 2**20:.1f} MiB).")
+
+    for partition, (start, stop) in partitions.items():
+        ann_index = IVFIndex.build(embeddings[start:stop])
+        ann_index.save(artifact_path(ann_file(partition), embedding_dir))
+        print(f"✅ ANN index for '{partition}' with {ann_index.n_lists} lists saved as '{ann_file(partition)}'.")
+    return partitions
+
+
+def build_recipe_embeddings(df, encode, model_name, embedding_dir=EMBEDDING_DIR, checkpoint_dir=CHECKPOINT_DIR,
+                            full_rebuild=False, checkpoint_size=CHECKPOINT_SIZE):
+    """
+    Build (or update) the recipe embedding store.
+    Args:
+        df (DataFrame): preprocessed recipes
+        encode (callable): list of texts -> embedding matrix
+        model_name (str): sentence model name, stored in the manifest
+        embedding_dir (str): store to update
+        checkpoint_dir (str): checkpoint directory of this build
+        full_rebuild (bool): ignore the current store and encode everything
+        checkpoint_size (int): texts encoded between checkpoints
+    Returns:
+        dict: partitions of the new store
+    """
+    df = df.reset_index(drop=True).copy()
+    texts = df[TEXT_COLUMN].map(recipe_text)
+    df[HASH_COLUMN] = [content_hash(text) for text in texts]
+
+    hashes = df[HASH_COLUMN].to_numpy(dtype=np.int64)
+    if full_rebuild:
+        reusable, previous = pd.Series(dtype=np.int64), None
+    else:
+        reusable, previous = previous_embeddings(embedding_dir, model_name)
+
+    # Unique texts that are not in the current store, in first-seen order
+    is_new = ~np.isin(hashes, reusable.index.to_numpy())
+    new_hashes, first_rows = np.unique(hashes[is_new], return_index=True)
+    order = np.argsort(first_rows)
+    new_hashes, first_rows = new_hashes[order], np.flatnonzero(is_new)[first_rows[order]]
+    new_texts = texts.iloc[first_rows].tolist()
+    print(f"{len(df)} recipes: {int((~is_new).sum())} reused, {len(new_texts)} unique texts to encode")
+
+    encoded = encode_with_checkpoints(new_texts, new_hashes, encode, model_name, checkpoint_dir, checkpoint_size)
+
+    # Assemble the matrix in recipe order from reused and newly encoded rows
+    dim = encoded.shape[1] if len(encoded) else previous.shape[1]
+    embeddings = np.empty((len(df), dim), dtype=np.float32)
+    if is_new.any():
+        embeddings[is_new] = encoded[pd.Index(new_hashes).get_indexer(hashes[is_new])]
+    if (~is_new).any():
+        previous_rows = reusable.loc[hashes[~is_new]].to_numpy()
+        order = np.argsort(previous_rows)  # read the memory-mapped matrix sequentially
+        reused = np.flatnonzero(~is_new)
+        embeddings[reused[order]] = np.asarray(previous[previous_rows[order]])
+
+    staging_dir = embedding_dir.rstrip("/") + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    partitions = write_store(df, normalize_rows(embeddings), staging_dir, model_name)
+    swap_directory(staging_dir, embedding_dir)
+    shutil.rmtree(checkpoint_dir, ignore_errors=True)
+    print(f"✅ Embeddings saved to '{embedding_dir}' (partitions: {partitions}).")
+    return partitions
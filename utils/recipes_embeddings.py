@@ -0,0 +1,113 @@
+import json
+import os
+
+import numpy as np
+
+from utils.data_store import read_table, write_table
+
+# Binary embedding store written by recipes_train_model.py
+#   embeddings.npy : one contiguous float32 matrix (rows x dim), L2-normalised
+#   ids.npy        : RecipeId for every row of the matrix
+#   meta.parquet   : recipe metadata (list columns kept as lists), same row order as the matrix
+#   manifest.json  : shape / dtype / model info and the diet partitions
+# Rows are grouped by DietaryCategory, so every partition is a contiguous
+# [start, stop) slice of the matrix and reading one never touches the others.
+EMBEDDING_DIR = "data/embeddings/recipes"
+EMBEDDINGS_FILE = "embeddings.npy"
+IDS_FILE = "ids.npy"
+META_FILE = "meta.parquet"
+MANIFEST_FILE = "manifest.json"
+
+PARTITION_COLUMN = "DietaryCategory"
+ALL_PARTITION = "all"
+
+
+def artifact_path(name, embedding_dir=EMBEDDING_DIR):
+    """Return the path of one file of the embedding store."""
+    return os.path.join(embedding_dir, name)
+
+
+def normalize_rows(matrix):
+    """L2-normalise every row so cosine similarity becomes a plain dot product."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def save_embeddings(meta_df, embeddings, embedding_dir=EMBEDDING_DIR, model_name=None):
+    """
+    Write the embedding store.
+    Args:
+        meta_df (DataFrame): recipe metadata, one row per embedding
+        embeddings (array): embedding matrix with shape (len(meta_df), dim)
+        embedding_dir (str): output directory
+        model_name (str): name of the sentence model used for encoding
+    Returns:
+        tuple: (meta DataFrame, embedding matrix, partitions) in stored row order
+    """
+    embeddings = normalize_rows(embeddings)
+    if len(meta_df) != len(embeddings):
+        raise ValueError(f"Got {len(embeddings)} embeddings for {len(meta_df)} recipes.")
+
+    # Group rows by diet so each partition is one contiguous slice
+    order = np.argsort(meta_df[PARTITION_COLUMN].to_numpy(dtype=str), kind="stable")
+    meta_df = meta_df.iloc[order].reset_index(drop=True)
+    embeddings = embeddings[order]
+    partitions = {ALL_PARTITION: [0, len(meta_df)]}
+    for name, rows in meta_df.groupby(PARTITION_COLUMN, sort=True).indices.items():
+        partitions[str(name)] = [int(rows[0]), int(rows[-1]) + 1]
+
+    os.makedirs(embedding_dir, exist_ok=True)
+    np.save(artifact_path(EMBEDDINGS_FILE, embedding_dir), np.ascontiguousarray(embeddings))
+    np.save(artifact_path(IDS_FILE, embedding_dir), meta_df["RecipeId"].to_numpy(dtype=np.int64))
+    write_table(meta_df, artifact_path(META_FILE, embedding_dir))
+
+    manifest = {
+        "rows": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "dtype": str(embeddings.dtype),
+        "normalized": True,
+        "model": model_name,
+        "partitions": partitions,
+    }
+    with open(artifact_path(MANIFEST_FILE, embedding_dir), "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+
+    return meta_df, embeddings, {name: tuple(bounds) for name, bounds in partitions.items()}
+
+
+def load_manifest(embedding_dir=EMBEDDING_DIR):
+    """Read manifest.json of the embedding store."""
+    with open(artifact_path(MANIFEST_FILE, embedding_dir)) as manifest_file:
+        return json.load(manifest_file)
+
+
+def load_partitions(embedding_dir=EMBEDDING_DIR):
+    """
+    Row ranges of every diet partition.
+    Returns:
+        dict: partition name -> (start, stop)
+    """
+    return {name: tuple(bounds) for name, bounds in load_manifest(embedding_dir)["partitions"].items()}
+
+
+def partition_for(diet_preference):
+    """Partition searched for a diet preference: only "Veg" restricts the catalogue."""
+    return "Veg" if diet_preference == "Veg" else ALL_PARTITION
+
+
+def load_embeddings(embedding_dir=EMBEDDING_DIR, mmap=True, columns=None):
+    """
+    Load the embedding store.
+    The matrix is memory-mapped read-only by default, so loading is close to free and
+    the pages are shared by every process that maps the same file.
+    Only the given metadata columns are read (None reads all).
+    Returns:
+        tuple: (meta DataFrame, embedding matrix, RecipeId array)
+    """
+    mmap_mode = "r" if mmap else None
+    embeddings = np.load(artifact_path(EMBEDDINGS_FILE, embedding_dir), mmap_mode=mmap_mode)
+    ids = np.load(artifact_path(IDS_FILE, embedding_dir), mmap_mode=mmap_mode)
+    meta_df = read_table(artifact_path(META_FILE, embedding_dir), columns=columns)
+    return meta_df, embeddings, ids
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+from utils.recipes_ann import REPORT_QUERIES, exact_search, noisy_queries
+from utils.recipes_embeddings import load_embeddings, load_partitions
+from utils.recipes_scoring import (NUTRIENT_COLUMNS, ScoringConfig, nutrient_matrix, nutrient_query,
+                                   rank_candidates, rank_partition)
+
+# Single-stage hybrid ranking against the two-stage path (ingredient top-N, then nutrient rerank).
+# Queries are noisy_queries() of the partition with the nutrients of another random recipe, so
+# ingredient and nutrient targets disagree the way they do for real users.
+# Quality: the blended score of the returned recipes (the hybrid top k is the best possible) and
+# how many of them the two-stage path never sees because they fall outside its candidate pool.
+CANDIDATE_POOLS = [50, 200, 1000]
+
+df, embeddings, _ = load_embeddings(columns=NUTRIENT_COLUMNS)
+partitions = load_partitions()
+nutrients_normalized = nutrient_matrix(df)
+config = ScoringConfig()
+
+rng = np.random.default_rng(42)
+print(f"📊 {len(embeddings)} recipes, {REPORT_QUERIES} queries, top_k={config.top_k}, "
+      f"weights {config.ingredient_weight}/{config.nutrient_weight}\n")
+
+for label, (start, stop) in partitions.items():
+    if stop - start < config.top_k:
+        continue
+    partition_embeddings = np.asarray(embeddings[start:stop])
+    partition_nutrients = nutrients_normalized[start:stop]
+    queries = noisy_queries(partition_embeddings, rng=rng)
+    n_queries = len(queries)
+    targets = [nutrient_query(df.iloc[start + row][NUTRIENT_COLUMNS])
+               for row in rng.choice(stop - start, size=n_queries)]
+    print(f"[{label}] {stop - start} recipes")
+
+    started = time.perf_counter()
+    hybrid = [rank_partition(partition_embeddings @ query, partition_nutrients, target, config)
+              for query, target in zip(queries, targets)]
+    hybrid_ms = (time.perf_counter() - started) * 1000 / n_queries
+    hybrid_score = np.mean([scores.mean() for _, scores, _, _ in hybrid])
+    print(f"[{label}] hybrid          : {hybrid_ms:.2f} ms/query  mean score {hybrid_score:.4f}")
+
+    for pool_size in CANDIDATE_POOLS:
+        pool_config = ScoringConfig(config.ingredient_weight, config.nutrient_weight, pool_size, config.top_k)
+        started = time.perf_counter()
+        two_stage = []
+        for query, target in zip(queries, targets):
+            rows, ingredient_scores = exact_search(query, partition_embeddings, pool_size)
+            two_stage.append(rank_candidates(rows, ingredient_scores, partition_nutrients, target, pool_config))
+        two_stage_ms = (time.perf_counter() - started) * 1000 / n_queries
+        two_stage_score = np.mean([scores.mean() for _, scores, _, _ in two_stage])
+        overlap = np.mean([len(set(h[0]) & set(t[0])) / len(h[0]) for h, t in zip(hybrid, two_stage)])
+        print(f"[{label}] two-stage N={pool_size:<4}: {two_stage_ms:.2f} ms/query  mean score {two_stage_score:.4f}  "
+              f"overlap@{config.top_k} {overlap:.3f}  missed {1 - overlap:.1%}")
+    print()
@@ -0,0 +1,44 @@
+import re
+
+# The raw recipes dataset stores list fields as R vectors: c("a", "b"), a single "a",
+# character(0) for an empty list, NA for a missing item. recipes_preprocess.py parses
+# them once into Python lists that are stored as Parquet list columns, so the pages and
+# the scorer read structured values instead of re-parsing strings on every rerun.
+LIST_COLUMNS = ["RecipeIngredientParts", "RecipeIngredientQuantities", "RecipeInstructions",
+                "Images", "Keywords", "RecipeCategory"]
+
+_ITEM = re.compile(r'"((?:[^"\\]|\\.)*)"')
+_ESCAPE = re.compile(r"\\(.)")
+
+
+def parse_r_list(value):
+    """
+    Parse one R vector string into a list of strings.
+    Quoted items may contain commas and escaped quotes; NA items are dropped.
+    A plain unquoted string (e.g. a RecipeCategory) becomes a one-item list.
+    """
+    if not isinstance(value, str):
+        return []
+    value = value.strip()
+    if not value or value in ("NA", "character(0)"):
+        return []
+    if '"' not in value:
+        return [value]
+    return [_ESCAPE.sub(r"\1", match.group(1)) for match in _ITEM.finditer(value)]
+
+
+def parse_list_columns(df, columns=LIST_COLUMNS):
+    """Replace the R vector strings of columns (those present in df) by lists, in place."""
+    for column in columns:
+        if column in df:
+            df[column] = df[column].map(parse_r_list)
+    return df
+
+
+def as_list(value):
+    """A list column value as a Python list (Parquet returns arrays; unparsed strings are parsed)."""
+    if isinstance(value, str):
+        return parse_r_list(value)
+    if value is None or isinstance(value, float):
+        return []
+    return list(value)
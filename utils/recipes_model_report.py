@@ -0,0 +1,29 @@
+import time
+
+started = time.perf_counter()
+from utils.recipes_recommend import RecipeRecommender
+from utils.sentence_model import resident_memory_bytes
+
+# Cold start of the recipes page: module import, artifact load, sentence model load and first encode.
+# Run it in a fresh process, every step is only paid once per process.
+import_seconds = time.perf_counter() - started
+rss_start = resident_memory_bytes()
+
+recommender = RecipeRecommender()
+started = time.perf_counter()
+recommender.ensure_loaded()
+load_seconds = time.perf_counter() - started
+
+model_st = recommender.get_model()
+started = time.perf_counter()
+model_st.encode("warm up", convert_to_numpy=True)
+first_encode_seconds = time.perf_counter() - started
+
+print("\n📊 Recipe recommender cold start")
+print(f"  import utils.recipes_recommend : {import_seconds:.2f}s")
+print(f"  load embedding store           : {load_seconds:.2f}s")
+print(f"  load sentence model            : {recommender.model_load_seconds:.2f}s")
+print(f"  first encode                   : {first_encode_seconds:.2f}s")
+print(f"  sentence model resident memory : {recommender.model_memory_bytes / 2**20:.0f} MiB")
+print(f"  process resident memory        : {resident_memory_bytes() / 2**20:.0f} MiB "
+      f"({rss_start / 2**20:.0f} MiB after import)")
@@ -0,0 +1,83 @@
+import os
+import pickle
+
+import numpy as np
+
+from utils.recipes_embeddings import ALL_PARTITION, PARTITION_COLUMN
+from utils.recipes_scoring import NUTRIENT_COLUMNS
+
+# Nutrient-only recipe search: one KD-tree per diet partition over the six slider nutrients,
+# built by recipes_preprocess.py. Each nutrient is standardised first so Calories (hundreds)
+# does not drown out Fiber (single grams). Results are RecipeIds; the recommender maps them
+# to rows of the embedding store metadata.
+NUTRIENT_INDEX_PATH = "data/preprocessed/recipes_nutrient_index.pkl"
+
+
+class NutrientIndex:
+    """Nearest recipes to a nutrient target, per diet partition."""
+
+    def __init__(self, mean, scale, trees, recipe_ids):
+        self.mean = mean
+        self.scale = scale
+        self.trees = trees            # partition -> sklearn KDTree
+        self.recipe_ids = recipe_ids  # partition -> RecipeId per tree row
+
+    @classmethod
+    def build(cls, df, columns=NUTRIENT_COLUMNS):
+        """Standardise the nutrients of df and build the per-partition trees."""
+        from sklearn.neighbors import KDTree
+
+        values = df[columns].fillna(0).to_numpy(dtype=np.float64)
+        mean = values.mean(axis=0)
+        scale = values.std(axis=0)
+        scale[scale == 0] = 1.0
+        scaled = (values - mean) / scale
+        recipe_ids = df["RecipeId"].to_numpy()
+
+        masks = {ALL_PARTITION: np.ones(len(df), dtype=bool)}
+        for partition in df[PARTITION_COLUMN].dropna().unique():
+            masks[str(partition)] = (df[PARTITION_COLUMN] == partition).to_numpy()
+
+        trees = {partition: KDTree(scaled[mask]) for partition, mask in masks.items()}
+        ids = {partition: recipe_ids[mask] for partition, mask in masks.items()}
+        return cls(mean, scale, trees, ids)
+
+    def save(self, path=NUTRIENT_INDEX_PATH):
+        """Write the index atomically: the recommender hot-reloads it while the app is running."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as index_file:
+            pickle.dump(self, index_file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=NUTRIENT_INDEX_PATH):
+        """Load the index, or return None when it has not been built."""
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as index_file:
+            return pickle.load(index_file)
+
+    def scale_query(self, nutrients, columns=NUTRIENT_COLUMNS):
+        """Slider values (dict, or a list of dicts) as standardised points."""
+        if isinstance(nutrients, dict):
+            nutrients = [nutrients]
+        values = np.array([[query[col] for col in columns] for query in nutrients], dtype=np.float64)
+        return (values - self.mean) / self.scale
+
+    def query(self, nutrients, partition, k):
+        """
+        Recipes closest to one or many nutrient targets.
+        Args:
+            nutrients (dict or list): slider values per nutrient column
+            partition (str): diet partition (falls back to "all" when missing)
+            k (int): recipes per target
+        Returns:
+            tuple: (RecipeIds, standardised distances), one row per target, nearest first
+        """
+        if partition not in self.trees:
+            partition = ALL_PARTITION
+        tree = self.trees[partition]
+        k = min(k, tree.data.shape[0])
+        distances, rows = tree.query(self.scale_query(nutrients), k=k)
+        return self.recipe_ids[partition][rows], distances
@@ -1,94 +1,126 @@
-import pandas as pd
+import argparse
+import os
+import shutil
 
-# Load dataset
-df = pd.read_csv("data/recipes.csv")
-df =df.iloc[0:20000]
-#df =df.iloc[0:3000] # For testing purposes
+import pandas as pd
+from utils.artifacts import swap_directory
+from utils.catalogue_stats import RECIPES_STATS_PATH, catalogue_stats, save_stats
+from utils.data_store import RECIPES_TABLE, read_table, table_files, write_table
+from utils.recipes_classify import classify_recipes
+from utils.recipes_embeddings import PARTITION_COLUMN
+from utils.recipes_lists import parse_list_columns
+from utils.recipes_nutrient_index import NUTRIENT_INDEX_PATH, NutrientIndex
+from utils.recipes_scoring import NUTRIENT_COLUMNS
+
+# Streaming preprocess: data/recipes.csv is read in chunks and every chunk is converted,
+# filtered, classified and written as its own Parquet part file, so peak memory depends on the
+# chunk size (derived from MEMORY_LIMIT_MB) rather than on the size of the dataset.
+# The R-style c("...") list columns are parsed into lists here, once (see utils/recipes_lists.py).
+RAW_RECIPES_PATH = "data/recipes.csv"
+PREPROCESSED_DIR = RECIPES_TABLE
+PART_FILE = "part-{:05d}.parquet"
+MEMORY_LIMIT_MB = 512
+SAMPLE_ROWS = 1000      # rows read to estimate the in-memory size of a recipe
+MEMORY_OVERHEAD = 4     # working copies of a chunk alive at once while it is processed
 
 # convert columns in mg to g
 in_mg = ['CholesterolContent', 'SodiumContent']
 
 in_grams = ['ProteinContent', 'FatContent', 'CarbohydrateContent', 'saturatedFatContent', 'FiberContent', 'SugarContent']
 
-# Convert units (grams to milligrams, micrograms to milligrams)
-df[in_mg] = df[in_mg] / 1000
-
-# Define non-vegetarian keywords
-non_veg_keywords = set([
-    # Meat & Poultry
-    "chicken", "beef", "pork", "mutton", "lamb", "turkey", "duck", "quail", "goat", "veal",
-    "rabbit", "boar", "venison", "bison", "kangaroo", "goose", "pheasant", "pigeon", "elk",
-
-    # Processed Meat Products
-    "bacon", "ham", "sausage", "pepperoni", "salami", "chorizo", "pastrami", "prosciutto",
-    "mortadella", "hot dog", "jerky", "liverwurst", "blood sausage", "scrapple",
-
-    # Seafood
-    "fish", "tuna", "salmon", "trout", "cod", "haddock", "mackerel", "sardine", "anchovy",
-    "herring", "catfish", "bass", "snapper", "grouper", "halibut", "swordfish", "mahi mahi",
-    "flounder", "eel", "shark", "sturgeon", "tilapia", "tuna steaks", "swordfish steaks",
-
-    # Shellfish
-    "shrimp", "prawns", "crab", "lobster", "crawfish", "squid", "octopus", "scallops",
-    "mussels", "clams", "oysters", "abalone", "conch",
-
-    # Animal-Based Ingredients
-    "egg", "eggs", "gelatin", "lard", "suet", "tallow", "bone broth", "fish sauce", "oyster sauce",
-    "shrimp paste", "anchovy paste", "worcestershire sauce", "caviar", "roe", "squid ink",
-
-    # Organ Meats (Offal)
-    "liver", "kidney", "heart", "brain", "tripe", "sweetbreads", "tongue", "gizzards"
-])
-
-# Function to classify recipes
-def classify_recipe(row):
-    """
-    Classifies a recipe as 'Vegetarian' or 'Non-Vegetarian' based on:
-    - `RecipeIngredientParts`
-    - `RecipeCategory`
-    """
-    # Extract ingredient list
-    ingredients = str(row["RecipeIngredientParts"]).lower().replace('"', '').replace("c(", "").replace(")", "")
-    ingredient_list = [ing.strip() for ing in ingredients.split(",")]
-
-    # Extract category list
-    categories = str(row["RecipeCategory"]).lower().replace('"', '').replace("c(", "").replace(")", "")
-    category_list = [cat.strip() for cat in categories.split(",")]
+# checking if all the columns have 0 as value
+nutrient_columns = ["Calories", "FatContent", "SaturatedFatContent", "CholesterolContent", 
+                        "SodiumContent", "CarbohydrateContent", "FiberContent", "SugarContent", "ProteinContent"]
 
-    # Extract and clean keywords list
-    keywords = str(row["Keywords"]).lower().replace('"', '').replace("c(", "").replace(")", "")
-    keyword_list = [kw.strip() for kw in keywords.split(",")]
 
-    # Extract recipe name
-    recipe_name = str(row["Name"]).lower()
+def preprocess_chunk(df):
+    """Unit conversion, zero-nutrient filtering, list parsing and diet classification of one chunk."""
+    # Convert units (grams to milligrams, micrograms to milligrams)
+    df[in_mg] = df[in_mg] / 1000
 
-    # Combine all text sources to check for non-veg keywords
-    all_text = ingredient_list + category_list + keyword_list + [recipe_name]
+    # Remove rows where all nutrient values are 0
+    df = df[~(df[nutrient_columns] == 0).all(axis=1)].copy()
 
-    # Check if any non-vegetarian keyword is found
-    if any(any(non_veg in item for non_veg in non_veg_keywords) for item in all_text):
-        return "Non-Veg"
+    # R vectors to lists
+    df = parse_list_columns(df)
 
-    return "Veg"
+    # Apply classification (one regex pass over the chunk, see utils/recipes_classify.py)
+    df["DietaryCategory"], df["NonVegKeyword"] = classify_recipes(df)
+    return df
 
-# checking if all the columns have 0 as value
-nutrient_columns = ["Calories", "FatContent", "SaturatedFatContent", "CholesterolContent", 
-                        "SodiumContent", "CarbohydrateContent", "FiberContent", "SugarContent", "ProteinContent"]
 
-# separate rows where all nutrient values are 0
-# This will create a DataFrame with only those rows
-zero_nutrient_rows = df[nutrient_columns][(df[nutrient_columns] == 0).all(axis=1)]
-# print(zero_nutrient_rows)
+def chunk_rows_for(input_path, memory_limit_mb=MEMORY_LIMIT_MB):
+    """Rows per chunk that keep one chunk (with its working copies) under memory_limit_mb."""
+    sample = pd.read_csv(input_path, nrows=SAMPLE_ROWS)
+    bytes_per_row = max(1, sample.memory_usage(deep=True).sum() / max(1, len(sample)))
+    return max(1, int(memory_limit_mb * 2**20 / (bytes_per_row * MEMORY_OVERHEAD)))
 
-# print total number of rows where all nutrient values are 0
-# zero_nutrient_row_count = (df[nutrient_columns] == 0).all(axis=1).sum()
-# print(zero_nutrient_row_count)
 
-# Remove rows where all nutrient values are 0
-df = df[~(df[nutrient_columns] == 0).all(axis=1)]
+def read_preprocessed_recipes(columns=None, preprocessed_dir=PREPROCESSED_DIR):
+    """Concatenate the part files, reading only the given columns."""
+    if not table_files(preprocessed_dir):
+        raise FileNotFoundError(f"No preprocessed recipes in '{preprocessed_dir}', run python -m utils.recipes_preprocess")
+    return read_table(preprocessed_dir, columns=columns)
 
-# Apply classification
-df["DietaryCategory"] = df.apply(classify_recipe, axis=1)
 
-# Save processed data
-df.to_csv("data/preprocessed/recipes.csv", index=False)
+def preprocess_recipes(input_path=RAW_RECIPES_PATH, preprocessed_dir=PREPROCESSED_DIR,
+                       memory_limit_mb=MEMORY_LIMIT_MB, limit=None):
+    """
+    Stream the raw recipes through preprocess_chunk into part files.
+    Args:
+        input_path (str): raw recipes CSV
+        preprocessed_dir (str): output directory of the part files (replaced at the end)
+        memory_limit_mb (int): memory budget of one chunk
+        limit (int): only read the first limit recipes (None reads everything)
+    Returns:
+        DataFrame: RecipeId, diet and slider nutrients of every kept recipe (for the nutrient index)
+    """
+    chunk_rows = chunk_rows_for(input_path, memory_limit_mb)
+    if limit:
+        chunk_rows = min(chunk_rows, limit)
+    print(f"Reading '{input_path}' in chunks of {chunk_rows} recipes ({memory_limit_mb} MB budget)")
+
+    staging_dir = preprocessed_dir.rstrip("/") + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+
+    index_columns = ["RecipeId", PARTITION_COLUMN] + NUTRIENT_COLUMNS
+    index_parts = []
+    kept = 0
+    for part, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_rows, nrows=limit)):
+        chunk = preprocess_chunk(chunk)
+        write_table(chunk, os.path.join(staging_dir, PART_FILE.format(part)))
+        index_parts.append(chunk[index_columns])
+        kept += len(chunk)
+        print(f"Part {part}: {len(chunk)} recipes kept ({kept} so far)")
+
+    swap_directory(staging_dir, preprocessed_dir)
+    print(f"✅ {kept} preprocessed recipes saved to '{preprocessed_dir}/'.")
+    return pd.concat(index_parts, ignore_index=True) if index_parts else pd.DataFrame(columns=index_columns)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Preprocess data/recipes.csv in memory-bounded chunks.")
+    parser.add_argument("--input", default=RAW_RECIPES_PATH, help="raw recipes CSV")
+    parser.add_argument("--output-dir", default=PREPROCESSED_DIR, help="directory of the part files")
+    parser.add_argument("--memory-limit-mb", type=int, default=MEMORY_LIMIT_MB, help="memory budget per chunk")
+    parser.add_argument("--limit", type=int, default=None, help="only preprocess the first N recipes")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index_df = preprocess_recipes(args.input, args.output_dir, args.memory_limit_mb, args.limit)
+
+    # Nutrient-only search index over the slider nutrients (see utils/recipes_nutrient_index.py)
+    nutrient_index = NutrientIndex.build(index_df)
+    nutrient_index.save()
+    print(f"✅ Nutrient index saved as '{NUTRIENT_INDEX_PATH}' (partitions: {', '.join(nutrient_index.trees)}).")
+
+    # Slider ranges, quantiles and diet counts for the recipes page
+    save_stats(catalogue_stats(index_df, NUTRIENT_COLUMNS, [PARTITION_COLUMN]), RECIPES_STATS_PATH)
+    print(f"✅ Catalogue stats saved as '{RECIPES_STATS_PATH}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+
+from utils.recipes_scoring import top_k_indices, top_k_rows
+
+# Compact copies of the embedding matrix for candidate retrieval.
+#   "int8"   : symmetric int8 codes with one float32 scale per vector (4x smaller)
+#   "float16": half precision (2x smaller)
+# Candidates found on the compact form are rescored with the float32 rows, so only
+# rerank_size rows per query are ever read from the full-precision matrix.
+STORAGE_TYPES = ("float32", "float16", "int8")
+RERANK_FACTOR = 4  # rescored candidates per returned candidate
+CHUNK_ROWS = 16384  # rows de-quantised at a time
+
+
+def quantized_files(storage):
+    """Files of one compact storage type: (codes, scales or None)."""
+    if storage == "int8":
+        return "embeddings_int8.npy", "scales_int8.npy"
+    if storage == "float16":
+        return "embeddings_f16.npy", None
+    raise ValueError(f"Invalid storage type: {storage}. Choose from: {', '.join(STORAGE_TYPES[1:])}")
+
+
+class QuantizedMatrix:
+    """Compact embedding matrix; slicing returns a view over the same rows."""
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, rows):
+        return QuantizedMatrix(self.codes[rows], None if self.scales is None else self.scales[rows])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    @classmethod
+    def from_float(cls, embeddings, storage):
+        """Quantise a float32 matrix."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if storage == "float16":
+            return cls(embeddings.astype(np.float16))
+        if storage == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(embeddings / scales[:, None]).astype(np.int8)
+            return cls(codes, scales.astype(np.float32))
+        raise ValueError(f"Invalid storage type: {storage}. Choose from: {', '.join(STORAGE_TYPES[1:])}")
+
+    def save(self, embedding_dir, storage):
+        codes_file, scales_file = quantized_files(storage)
+        np.save(os.path.join(embedding_dir, codes_file), self.codes)
+        if scales_file:
+            np.save(os.path.join(embedding_dir, scales_file), self.scales)
+
+    @classmethod
+    def load(cls, embedding_dir, storage, mmap=True):
+        """Load a compact matrix, or return None when it has not been built."""
+        codes_file, scales_file = quantized_files(storage)
+        codes_path = os.path.join(embedding_dir, codes_file)
+        if not os.path.exists(codes_path):
+            return None
+        mmap_mode = "r" if mmap else None
+        scales = np.load(os.path.join(embedding_dir, scales_file), mmap_mode=mmap_mode) if scales_file else None
+        return cls(np.load(codes_path, mmap_mode=mmap_mode), scales)
+
+    def scores(self, queries):
+        """
+        Approximate dot products with one query (dim,) or many (m, dim), computed in row chunks.
+        Returns (rows,) or (m, rows).
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        scores = np.empty((len(queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), CHUNK_ROWS):
+            chunk = np.asarray(self.codes[start:start + CHUNK_ROWS], dtype=np.float32)
+            chunk_scores = queries @ chunk.T
+            if self.scales is not None:
+                chunk_scores *= np.asarray(self.scales[start:start + CHUNK_ROWS])
+            scores[:, start:start + CHUNK_ROWS] = chunk_scores
+        return scores[0] if single else scores
+
+    def search(self, query, embeddings, k, rerank_factor=RERANK_FACTOR):
+        """
+        Top-k rows: candidates on the compact form, rescored in float32.
+        Args:
+            query (array): L2-normalised query vector
+            embeddings (array): float32 matrix with the same rows
+            k (int): number of rows to return
+            rerank_factor (int): candidates rescored per returned row
+        Returns:
+            tuple: (row indices, float32 similarity scores), best first
+        """
+        candidates = np.sort(top_k_indices(self.scores(query), k * rerank_factor))
+        scores = np.asarray(embeddings[candidates], dtype=np.float32) @ query
+        top = top_k_indices(scores, k)
+        return candidates[top], scores[top]
+
+    def search_batch(self, queries, embeddings, k, rerank_factor=RERANK_FACTOR):
+        """search() for many queries, with one compact matrix product for the candidate stage."""
+        candidates = top_k_rows(self.scores(queries), k * rerank_factor)
+        results = []
+        for query, rows in zip(queries, candidates):
+            rows = np.sort(rows)
+            scores = np.asarray(embeddings[rows], dtype=np.float32) @ query
+            top = top_k_indices(scores, k)
+            results.append((rows[top], scores[top]))
+        return results
@@ -0,0 +1,43 @@
+import time
+
+import numpy as np
+
+from utils.recipes_ann import exact_search, noisy_queries, recall_at_k
+from utils.recipes_embeddings import EMBEDDING_DIR, load_embeddings
+from utils.recipes_quantize import QuantizedMatrix
+from utils.recipes_scoring import top_k_indices
+
+# Memory saved by the compact embedding formats and how much the candidate ranking moves,
+# on noisy_queries().
+K = 50
+
+_, embeddings, _ = load_embeddings()
+queries = noisy_queries(embeddings)
+exact_results = [exact_search(query, embeddings, K)[0] for query in queries]
+
+print(f"📊 {len(embeddings)} recipes, {len(queries)} queries, k={K}")
+print(f"float32: {embeddings.nbytes / 2**20:.1f} MiB\n")
+
+for storage in ["float16", "int8"]:
+    quantized = QuantizedMatrix.load(EMBEDDING_DIR, storage, mmap=False)
+    if quantized is None:
+        print(f"{storage}: not built, run python -m utils.recipes_train_model\n")
+        continue
+
+    compact_scores = quantized.scores(queries)
+    score_error = np.abs(compact_scores - queries @ np.asarray(embeddings).T).max()
+    compact_recall = np.mean([recall_at_k(top_k_indices(scores, K), exact)
+                              for scores, exact in zip(compact_scores, exact_results)])
+
+    started = time.perf_counter()
+    reranked = [quantized.search(query, embeddings, K)[0] for query in queries]
+    search_ms = (time.perf_counter() - started) * 1000 / len(queries)
+    reranked_recall = np.mean([recall_at_k(rows, exact) for rows, exact in zip(reranked, exact_results)])
+    top5_same = np.mean([set(rows[:5]) == set(exact[:5]) for rows, exact in zip(reranked, exact_results)])
+
+    print(f"{storage}: {quantized.nbytes / 2**20:.1f} MiB ({embeddings.nbytes / quantized.nbytes:.1f}x smaller)")
+    print(f"  max score error      : {score_error:.5f}")
+    print(f"  recall@{K} (compact)  : {compact_recall:.3f}")
+    print(f"  recall@{K} (reranked) : {reranked_recall:.3f}")
+    print(f"  same top-5 set       : {top5_same:.1%}")
+    print(f"  search               : {search_ms:.2f} ms/query\n")
@@ -0,0 +1,45 @@
+import numpy as np
+
+from utils.data_store import FOOD_TABLE, read_table
+from utils.recipes_ann import exact_search
+from utils.recipes_recommend import RecipeRecommender
+from utils.recipes_scoring import NUTRIENT_COLUMNS, ScoringConfig
+
+# Rankings with "pooled" query embeddings (mean of the stored food vectors, no model) against the
+# "model" encoding of the same selection. Queries are random selections of 1-3 food descriptions,
+# as the recipes page sends them, with the catalogue's median nutrients as slider targets.
+N_QUERIES = 300
+SELECTION_SIZES = [1, 2, 3]
+POOL_SIZE = ScoringConfig().candidate_pool_size
+
+recommender = RecipeRecommender(query_cache_path=None)
+artifacts = recommender.snapshot()
+descriptions = read_table(FOOD_TABLE, columns=["description"])["description"].dropna().unique()
+nutrients = artifacts.df[NUTRIENT_COLUMNS].median().to_dict()
+config = ScoringConfig()
+
+rng = np.random.default_rng(42)
+print(f"📊 {len(artifacts.df)} recipes, {len(descriptions)} foods, {N_QUERIES} queries per selection size\n")
+
+for size in SELECTION_SIZES:
+    selections = [list(rng.choice(descriptions, size=size, replace=False)) for _ in range(N_QUERIES)]
+    model_queries = recommender.encode_queries(selections, "model")
+    pooled_queries = recommender.encode_queries(selections, "pooled")
+    cosine = np.mean(np.sum(model_queries * pooled_queries, axis=1))
+
+    # Ingredient candidates (stage one) over the whole catalogue
+    model_pools = [set(exact_search(query, artifacts.embeddings, POOL_SIZE)[0]) for query in model_queries]
+    pooled_pools = [set(exact_search(query, artifacts.embeddings, POOL_SIZE)[0]) for query in pooled_queries]
+    pool_overlap = np.mean([len(m & p) / POOL_SIZE for m, p in zip(model_pools, pooled_pools)])
+
+    # Final recommendations
+    queries = [(nutrients, selection, None) for selection in selections]
+    model_names = [[recipe["Name"] for recipe in recipes]
+                   for _, recipes in recommender.recommend_batch(queries, config=config, query_mode="model")]
+    pooled_names = [[recipe["Name"] for recipe in recipes]
+                    for _, recipes in recommender.recommend_batch(queries, config=config, query_mode="pooled")]
+    top_overlap = np.mean([len(set(m) & set(p)) / max(len(m), 1) for m, p in zip(model_names, pooled_names)])
+    top_same = np.mean([m == p for m, p in zip(model_names, pooled_names)])
+
+    print(f"{size} food(s): query cosine {cosine:.3f}  overlap@{POOL_SIZE} {pool_overlap:.3f}  "
+          f"overlap@{config.top_k} {top_overlap:.3f}  identical top {config.top_k} {top_same:.1%}")
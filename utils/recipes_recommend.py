@@ -1,148 +1,527 @@
 import numpy as np
 import pandas as pd
-import torch
-from sentence_transformers import SentenceTransformer, util
-from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+import atexit
+import os
+import threading
+import time
+from dataclasses import dataclass
+from utils.artifacts import artifact_signature, resolve_directory
+from utils.food_embeddings import (FOOD_EMBEDDING_DIR, FOOD_EMBEDDINGS_FILE, FOOD_KEYS_FILE, QUERY_MODES,
+                                   FoodEmbeddingStore, food_embeddings_path)
+from utils.query_cache import QueryEmbeddingCache, query_key, query_text
+from utils.recipes_ann import DEFAULT_N_PROBE, IVFIndex, ann_file, exact_search
+from utils.recipes_embeddings import (EMBEDDING_DIR, EMBEDDINGS_FILE, IDS_FILE, MANIFEST_FILE, META_FILE,
+                                      artifact_path, load_embeddings, load_partitions, normalize_rows,
+                                      partition_for)
+from utils.recipes_nutrient_index import NUTRIENT_INDEX_PATH, NutrientIndex
+from utils.recipes_quantize import STORAGE_TYPES, QuantizedMatrix, quantized_files
+from utils.recipes_scoring import (ScoringConfig, nutrient_matrix, nutrient_query, rank_candidates, rank_partition,
+                                   top_k_rows)
+from utils.sentence_model import MODEL_DIR, load_sentence_model, model_files, model_signature
 
-# Set device (CPU or GPU)
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+# torch, sentence_transformers and sklearn are not imported here: the sentence model (and with it
+# torch) is imported by utils/sentence_model.py on the first query that needs it, so the page can
+# render before any of them load. utils/import_time_check.py guards this.
 
-import torch
+MODEL_PATH = MODEL_DIR
 
-@torch.jit.script
-class MyCustomClass:
-    def __init__(self):
-        pass
+# Load the sentence model in a background thread when the recommender is created,
+# so the first query that needs it does not wait for it
+BACKGROUND_WARM_UP = False
+
+# Stage-one search: "exact" scans every embedding, "approx" uses the IVF index.
+# "nutrient" skips the ingredients and returns the recipes nearest to the slider targets
+# (KD-tree over the whole partition, see utils/recipes_nutrient_index.py).
+# "hybrid" blends ingredient and nutrient similarity for every recipe of the partition in one
+# pass instead of reranking only the ingredient stage's candidate pool
+SEARCH_MODES = ("exact", "approx", "nutrient", "hybrid")
+DEFAULT_SEARCH_MODE = "exact"
+
+# Matrix used for exact candidate retrieval: "float32", or a compact "float16" / "int8"
+# copy whose candidates are rescored in float32 (see utils/recipes_quantize.py)
+DEFAULT_STORAGE = "float32"
+
+# How query embeddings are built, see utils/food_embeddings.py. "exact" answers single-food selections
+# from the food store with the model's own vectors, so rankings match "model" without loading it.
+# "pooled" also skips the model for several foods but approximates its encoding;
+# python -m utils.recipes_query_mode_report measures the ranking change
+DEFAULT_QUERY_MODE = "exact"
+
+# Query embeddings cached by normalised ingredient set, persisted across restarts
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_PATH = "data/embeddings/query_cache.npz"
+QUERY_CACHE_SAVE_EVERY = 16  # new entries between writes
+
+# Queries scored together by recommend_recipes_batch (bounds the score matrix size)
+BATCH_SIZE = 512
+
+# Columns returned to the UI for every recommended recipe
+RECOMMENDATION_COLUMNS = [
+    "Name", "CookTime", "Images", "RecipeCategory", "Keywords",
+    "RecipeIngredientQuantities", "RecipeIngredientParts",
+    "Calories", "FatContent", "SaturatedFatContent", "CholesterolContent",
+    "SodiumContent", "CarbohydrateContent", "FiberContent",
+    "SugarContent", "ProteinContent", "RecipeInstructions", "DietaryCategory"
+]
 
 # Load model
 def load_data():
-    """ Load dataset with embeddings """
-    df = pd.read_csv("data/embeddings/recipes.csv")
-    
-    # Ensure embeddings are properly converted to tensors and moved to the correct device
-    df["IngredientEmbedding"] = df["IngredientEmbedding"].apply(lambda x: torch.tensor(eval(x)).to(device))
+    """ Load recipe metadata with the memory-mapped embedding matrix """
+    df, embeddings, _ = load_embeddings()
+    model_st, _, _ = load_sentence_model(MODEL_PATH)
+    return df, embeddings, model_st
 
-    with open("models/recipes_st.pkl", "rb") as model_file:
-        model_st = pickle.load(model_file)
 
-    return df, model_st
+@dataclass
+class RecipeArtifacts:
+    """
+    One generation of loaded artifacts. A reload builds a new instance and swaps it in with a
+    single assignment; a query takes one instance at the start and uses only that one.
+    """
+    df: pd.DataFrame
+    embeddings: np.ndarray
+    ids: np.ndarray
+    partitions: dict
+    ann_indexes: dict
+    food_store: FoodEmbeddingStore
+    quantized: QuantizedMatrix
+    nutrients_normalized: np.ndarray
+    nutrient_index: NutrientIndex = None  # loaded by the first nutrient search
+    id_rows: pd.Index = None
 
-def recommend_recipes(nutrients, ingredients, diet_preference):
-#def recommend_recipes(ingredients, diet_preference):
-    """Recommend recipes based on user nutrients, ingredients, and dietary preference."""
-    df, model_st = load_data()
 
-    # Filter by dietary preference
-    if diet_preference == "Veg":
-        df_filtered = df[df["DietaryCategory"] == diet_preference].copy()
-    else:
-        df_filtered = df.copy()
+class RecipeRecommender:
+    """
+    Keeps the sentence model, embedding matrix and recipe metadata warm for the
+    lifetime of the server process. Artifacts are reloaded when their files change.
+    """
 
-    # Encode input ingredients and move them to the same device
-    input_embedding = model_st.encode(" ".join(ingredients), convert_to_tensor=True).to(device)
+    def __init__(self, embedding_dir=EMBEDDING_DIR, model_path=MODEL_PATH, query_cache_size=QUERY_CACHE_SIZE,
+                 query_cache_path=QUERY_CACHE_PATH, food_embedding_dir=FOOD_EMBEDDING_DIR, storage=DEFAULT_STORAGE,
+                 nutrient_index_path=NUTRIENT_INDEX_PATH):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Invalid storage type: {storage}. Choose from: {', '.join(STORAGE_TYPES)}")
+        self.embedding_dir = embedding_dir
+        self.storage = storage
+        self.model_path = model_path
+        self.food_embedding_dir = food_embedding_dir
+        self.nutrient_index_path = nutrient_index_path
+        self.query_cache = QueryEmbeddingCache(max_size=query_cache_size, path=query_cache_path)
+        self._unsaved_queries = 0
+        self.artifacts = None
+        self.model_st = None
+        self.warm = False
+        self.model_load_seconds = None
+        self.model_memory_bytes = None
+        self._warm_up_thread = None
+        self.loaded_at = None
+        self.load_seconds = None
+        self.load_count = 0
+        self._signature = None
+        self._model_signature = None
+        self._lock = threading.RLock()
 
-    # Stack ingredient embeddings and move to the same device
-    ingredient_embeddings = torch.stack(df_filtered["IngredientEmbedding"].tolist()).to(device)
+    # Fields of the current generation (None before the first load)
+    df = property(lambda self: None if self.artifacts is None else self.artifacts.df)
+    embeddings = property(lambda self: None if self.artifacts is None else self.artifacts.embeddings)
+    ids = property(lambda self: None if self.artifacts is None else self.artifacts.ids)
+    quantized = property(lambda self: None if self.artifacts is None else self.artifacts.quantized)
+    food_store = property(lambda self: None if self.artifacts is None else self.artifacts.food_store)
+    partitions = property(lambda self: {} if self.artifacts is None else self.artifacts.partitions)
+    ann_indexes = property(lambda self: {} if self.artifacts is None else self.artifacts.ann_indexes)
+    nutrient_index = property(lambda self: None if self.artifacts is None else self.artifacts.nutrient_index)
 
-    """# Compute cosine similarity
-    ingredient_similarities = util.pytorch_cos_sim(ingredient_embeddings, input_embedding).squeeze().cpu().numpy()
+    def artifact_paths(self, partitions=None):
+        """Files whose modification triggers a reload (ANN indexes of partitions, default: the loaded ones)."""
+        paths = [
+            artifact_path(EMBEDDINGS_FILE, self.embedding_dir),
+            artifact_path(IDS_FILE, self.embedding_dir),
+            artifact_path(META_FILE, self.embedding_dir),
+            artifact_path(MANIFEST_FILE, self.embedding_dir),
+            food_embeddings_path(FOOD_KEYS_FILE, self.food_embedding_dir),
+            food_embeddings_path(FOOD_EMBEDDINGS_FILE, self.food_embedding_dir),
+            self.nutrient_index_path,
+        ]
+        paths += model_files(self.model_path)
+        partitions = self.partitions if partitions is None else partitions
+        paths += [artifact_path(ann_file(partition), self.embedding_dir) for partition in partitions]
+        if self.storage != "float32":
+            paths += [artifact_path(name, self.embedding_dir) for name in quantized_files(self.storage) if name]
+        return paths
 
-    # Compute Euclidean similarity for nutrients
-    # nutrient_columns = ["Calories", "FatContent", "SaturatedFatContent", "CholesterolContent", 
-    #                     "SodiumContent", "CarbohydrateContent", "FiberContent", "SugarContent", "ProteinContent"]
+    def load(self):
+        """(Re)load every artifact from disk. The sentence model itself is loaded lazily by get_model()."""
+        with self._lock:
+            started = time.perf_counter()
+            # Signature first: a store published while loading leaves it stale, so the next query reloads
+            signature = artifact_signature(self.artifact_paths(load_partitions(self.embedding_dir)))
+            current_model = model_signature(self.model_path)
+            # Every file comes from the version published now, even if a new one is swapped in meanwhile
+            embedding_dir = resolve_directory(self.embedding_dir)
+            # Only the columns shown to the user (the slider nutrients are among them)
+            df, embeddings, ids = load_embeddings(embedding_dir, columns=RECOMMENDATION_COLUMNS)
+            partitions = load_partitions(embedding_dir)
+            food_store = FoodEmbeddingStore.load(resolve_directory(self.food_embedding_dir))
+            quantized = None
+            if self.storage != "float32":
+                quantized = QuantizedMatrix.load(embedding_dir, self.storage)
+                if quantized is None:
+                    print(f"⚠️ No {self.storage} embeddings found, using float32.")
+            ann_indexes = {}
+            for partition in partitions:
+                ann_path = artifact_path(ann_file(partition), embedding_dir)
+                if os.path.exists(ann_path):
+                    ann_indexes[partition] = IVFIndex.load(ann_path)
 
-    nutrient_columns = ["Calories", "FatContent", "CarbohydrateContent", "FiberContent", "SugarContent", "ProteinContent"]
-    
-    df_nutrients = df_filtered[nutrient_columns].fillna(0).to_numpy()
-    input_nutrient_array = np.array([nutrients[col] for col in nutrient_columns]).reshape(1, -1)
-    if input_nutrient_array.max() > 0:
-        input_nutrient_array = input_nutrient_array/input_nutrient_array.max() # to normalize
+            self.artifacts = RecipeArtifacts(df, embeddings, ids, partitions, ann_indexes, food_store, quantized,
+                                             nutrient_matrix(df))
+            if current_model != self._model_signature:
+                self.model_st = None
+                self.warm = False
+                self._model_signature = current_model
+            self._reset_query_cache(current_model)
+            self._signature = signature
+            self.loaded_at = time.time()
+            self.load_seconds = time.perf_counter() - started
+            self.load_count += 1
+            print(f"✅ Recipe recommender loaded in {self.load_seconds:.2f}s ({len(df)} recipes).")
 
-    #nutrient_distances = np.linalg.norm(df_nutrients - input_nutrient_array, axis=1)
-    #nutrient_similarities = 1 / (1 + nutrient_distances)
+    def ensure_loaded(self):
+        """Load on first use and hot-reload when an artifact file has changed."""
+        if self._signature is not None and artifact_signature(self.artifact_paths()) == self._signature:
+            return self
+        with self._lock:
+            if self._signature is None or artifact_signature(self.artifact_paths()) != self._signature:
+                self.load()
+        return self
 
-    #trying cosine similarity
-    # Extract recipe nutrient vectors
-    recipe_vectors = np.array(df_filtered[nutrient_columns].values)  # Get nutrient values only
-    recipe_vectors = recipe_vectors/recipe_vectors.max() # to normalize
+    def snapshot(self):
+        """The current artifact generation, (re)loaded first if needed."""
+        self.ensure_loaded()
+        return self.artifacts
 
-    # Compute cosine similarity between user input and all recipes
-    nutrient_similarities = cosine_similarity(input_nutrient_array, recipe_vectors)
+    def get_model(self):
+        """Sentence model, loaded on the first query that needs it."""
+        if self.model_st is None:
+            with self._lock:
+                if self.model_st is None:
+                    model_st, self.model_load_seconds, self.model_memory_bytes = load_sentence_model(self.model_path)
+                    self.model_st = model_st
+                    print(f"✅ Sentence model loaded in {self.model_load_seconds:.2f}s "
+                          f"(+{self.model_memory_bytes / 2**20:.0f} MiB resident).")
+        return self.model_st
 
-    # Add similarity scores to DataFrame
-    df_filtered["similarity"] = nutrient_similarities[0]
+    def get_nutrient_index(self, artifacts=None):
+        """Nutrient KD-trees of a generation (default: the current one), loaded on its first nutrient search."""
+        artifacts = artifacts or self.snapshot()
+        if artifacts.nutrient_index is None:
+            with self._lock:
+                if artifacts.nutrient_index is None:
+                    nutrient_index = NutrientIndex.load(self.nutrient_index_path)
+                    if nutrient_index is None:
+                        raise FileNotFoundError(f"No nutrient index at '{self.nutrient_index_path}', "
+                                                "run python -m utils.recipes_preprocess")
+                    artifacts.id_rows = pd.Index(np.asarray(artifacts.ids))
+                    artifacts.nutrient_index = nutrient_index
+        return artifacts.nutrient_index
 
-    # Sort recipes by similarity score
-    #recommended_recipes = recipes.sort_values(by="similarity", ascending=False)
+    def nutrient_search(self, nutrients_list, partition, k, artifacts=None):
+        """Store rows of the k recipes nearest to each nutrient target, nearest first."""
+        artifacts = artifacts or self.snapshot()
+        recipe_ids, _ = self.get_nutrient_index(artifacts).query(nutrients_list, partition, k)
+        rows = artifacts.id_rows.get_indexer(recipe_ids.ravel()).reshape(recipe_ids.shape)
+        return [row[row >= 0] for row in rows]  # recipes missing from the store are skipped
 
-    # Display Top Recommendations
-    #print(recommended_recipes[["recipe", "similarity"]])
+    def _reset_query_cache(self, model_fingerprint):
+        """Drop cached query embeddings when the model changes, then restore the persisted warm set."""
+        if self.query_cache.fingerprint == model_fingerprint:
+            return
+        self.query_cache.clear()
+        self.query_cache.fingerprint = model_fingerprint
+        restored = self.query_cache.load()
+        if restored:
+            print(f"✅ Restored {restored} cached query embeddings.")
 
-    # Final score (weighted)
-    final_scores = (0.4 * nutrient_similarities) + (0.6 * ingredient_similarities)
+    def save_query_cache(self):
+        """Persist the query-embedding cache (no-op without a cache path)."""
+        if self._unsaved_queries:
+            self.query_cache.save()
+            self._unsaved_queries = 0
 
-    # Get top recommendations
-    df_filtered["SimilarityScore"] = final_scores.flatten()
-    top_recipes = df_filtered.sort_values(by="SimilarityScore", ascending=False).head(5)
+    def warm_up(self):
+        """Run one forward pass so the first real query does not pay for it."""
+        self.ensure_loaded()
+        self.get_model().encode("warm up", convert_to_numpy=True)
+        self.warm = True
+        return self
 
-    return top_recipes[
-        [
-            "Name", "CookTime", "Images", "RecipeCategory", "Keywords", 
-            "RecipeIngredientQuantities", "RecipeIngredientParts", 
-            "Calories", "FatContent", "SaturatedFatContent", "CholesterolContent", 
-            "SodiumContent", "CarbohydrateContent", "FiberContent", 
-            "SugarContent", "ProteinContent", "RecipeInstructions", "DietaryCategory"
-        ]
-    ].to_dict(orient="records")"""
-# trying to get recommendation in two steps
-# Compute cosine similarity
-    ingredient_similarities = util.pytorch_cos_sim(ingredient_embeddings, input_embedding).squeeze().cpu().numpy()
-
- # Add similarity scores to DataFrame
-   # 
-    df_filtered["ingredient_similarity"] = ingredient_similarities
-    # Sort recipes by similarity score
-    recommended_recipes = df_filtered.sort_values(by="ingredient_similarity", ascending=False)
-
-    recommended_recipes=recommended_recipes.head(50)
-     # Compute Euclidean similarity for nutrients
-    nutrient_columns = ["Calories", "FatContent", "CarbohydrateContent", "FiberContent", 
-                        "SugarContent", "ProteinContent"]
-    
-    df_nutrients = recommended_recipes[nutrient_columns].fillna(0).to_numpy()
-    input_nutrient_array = np.array([nutrients[col] for col in nutrient_columns]).reshape(1, -1)
-    if input_nutrient_array.max() > 0:
-        input_nutrient_array = input_nutrient_array/input_nutrient_array.max() # to normalize
-
-    # Extract recipe nutrient vectors
-    recipe_vectors = np.array(recommended_recipes[nutrient_columns].values)  # Get nutrient values only
-    recipe_vectors = recipe_vectors/recipe_vectors.max() # to normalize
-
-    # Compute cosine similarity between user input and all recipes
-    nutrient_similarities = cosine_similarity(input_nutrient_array, recipe_vectors)
-
-    # Add similarity scores to DataFrame
-    recommended_recipes["nutrient_similarity"] = nutrient_similarities[0]
-     # Final score (weighted)
-    #final_scores = (0.5 * nutrient_similarities) + (0.5 * ingredient_similarities)
-
-      # Get top recommendations
-    recommended_recipes["SimilarityScore"] = recommended_recipes.apply(lambda row:row["nutrient_similarity"]*0.5 + row["ingredient_similarity"]*0.5, axis=1)
-
-    # Sort recipes by similarity score
-    recommended_recipes = recommended_recipes.sort_values(by="SimilarityScore", ascending=False)
-    top_recipes = recommended_recipes.head(5)
-    return top_recipes[
-        [
-            "Name", "CookTime", "Images", "RecipeCategory", "Keywords", 
-            "RecipeIngredientQuantities", "RecipeIngredientParts", 
-            "Calories", "FatContent", "SaturatedFatContent", "CholesterolContent", 
-            "SodiumContent", "CarbohydrateContent", "FiberContent", 
-            "SugarContent", "ProteinContent", "RecipeInstructions", "DietaryCategory"
-        ]
-    ].to_dict(orient="records")
-    # Display Top Recommendations
-    #print(recommended_recipes[["recipe", "similarity"]])    
-    #return recommended_recipes
-#print (recommend_recipes('iron','veg'))
\ No newline at end of file
+    def start_warm_up(self):
+        """warm_up() in a daemon thread; queries that need the model meanwhile wait on the lock."""
+        if self._warm_up_thread is None and not self.warm:
+            self._warm_up_thread = threading.Thread(target=self._background_warm_up, name="recipes-warm-up",
+                                                    daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _background_warm_up(self):
+        try:
+            self.warm_up()
+        except Exception as error:  # the first query loads the model again and surfaces the error
+            print(f"⚠️ Background warm-up failed: {error}")
+        finally:
+            self._warm_up_thread = None
+
+    def status(self):
+        """Load / warm status for display and monitoring."""
+        return {
+            "loaded": self._signature is not None,
+            "model_loaded": self.model_st is not None,
+            "warm": self.warm,
+            "warming_up": self._warm_up_thread is not None,
+            "model_load_seconds": self.model_load_seconds,
+            "model_memory_bytes": self.model_memory_bytes,
+            "food_embeddings": 0 if self.food_store is None else len(self.food_store),
+            "recipes": 0 if self.df is None else len(self.df),
+            "storage": self.storage if self.quantized is not None else "float32",
+            "partitions": {name: stop - start for name, (start, stop) in self.partitions.items()},
+            "ann_indexes": sorted(self.ann_indexes),
+            "nutrient_index": self.nutrient_index is not None,
+            "query_cache": self.query_cache.stats(),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+            "load_count": self.load_count,
+        }
+
+    def encode_queries(self, ingredient_lists, query_mode=DEFAULT_QUERY_MODE, artifacts=None):
+        """
+        Embeddings for many ingredient selections.
+        Selections answered by the stored food vectors (see query_mode) and cached selections
+        skip the model; the rest are encoded in one batched call.
+        """
+        if query_mode not in QUERY_MODES:
+            raise ValueError(f"Invalid query mode: {query_mode}. Choose from: {', '.join(QUERY_MODES)}")
+        food_store = (artifacts or self.snapshot()).food_store
+        keys = [query_key(ingredients) for ingredients in ingredient_lists]
+        query_embeddings = [None] * len(keys)
+        if food_store is not None:
+            query_embeddings = [food_store.compose(key, query_mode) for key in keys]
+        query_embeddings = [self.query_cache.get(key) if embedding is None else embedding
+                            for key, embedding in zip(keys, query_embeddings)]
+
+        missing = list(dict.fromkeys(key for key, embedding in zip(keys, query_embeddings) if embedding is None))
+        if missing:
+            encoded = normalize_rows(self.get_model().encode([query_text(key) for key in missing], convert_to_numpy=True))
+            self.warm = True
+            encoded_by_key = dict(zip(missing, encoded))
+            for key in missing:
+                self.query_cache.put(key, encoded_by_key[key])
+            query_embeddings = [encoded_by_key[key] if embedding is None else embedding
+                                for key, embedding in zip(keys, query_embeddings)]
+            self._unsaved_queries += len(missing)
+            if self._unsaved_queries >= QUERY_CACHE_SAVE_EVERY:
+                self.save_query_cache()
+
+        return np.stack(query_embeddings)
+
+    def recommend_batch(self, queries, mode=DEFAULT_SEARCH_MODE, n_probe=DEFAULT_N_PROBE, config=None,
+                        batch_size=BATCH_SIZE, query_mode=DEFAULT_QUERY_MODE):
+        """
+        Recommend recipes for many user profiles.
+        Every chunk of queries is encoded in one model call and scored per partition with a
+        single (queries x recipes) matrix product.
+        Args:
+            queries (iterable): (nutrients, ingredients, diet_preference) tuples
+            mode (str): "exact" or "approx" ingredient search, "nutrient" only, or "hybrid" over the partition
+            n_probe (int): IVF cells scanned in "approx" mode
+            config (ScoringConfig): weights, candidate pool size and number of results
+            batch_size (int): queries encoded and scored together
+            query_mode (str): "pooled", "exact" or "model" query embeddings
+        Yields:
+            tuple: (query position, list of top recipes as dicts), in input order
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search mode: {mode}. Choose from: {', '.join(SEARCH_MODES)}")
+        config = config or ScoringConfig()
+        # One generation for the whole call, even if a reload happens meanwhile
+        artifacts = self.snapshot()
+        df, embeddings = artifacts.df, artifacts.embeddings
+
+        position = 0
+        for chunk in _chunked(queries, batch_size):
+            if mode == "nutrient":
+                results = [None] * len(chunk)
+                partitions = [partition_for(diet_preference) for _, _, diet_preference in chunk]
+                for partition in set(partitions):
+                    members = [i for i, name in enumerate(partitions) if name == partition]
+                    rows = self.nutrient_search([chunk[i][0] for i in members], partition, config.top_k,
+                                                artifacts)
+                    for i, top_rows in zip(members, rows):
+                        results[i] = top_rows
+                for i, top_rows in enumerate(results):
+                    yield position + i, df.iloc[top_rows][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+                position += len(chunk)
+                continue
+
+            query_embeddings = self.encode_queries([ingredients for _, ingredients, _ in chunk], query_mode, artifacts)
+            partitions = [partition_for(diet_preference) for _, _, diet_preference in chunk]
+            candidates = [None] * len(chunk)
+
+            if mode == "hybrid":
+                # One (queries x recipes) blended score matrix per partition, no candidate pool
+                results = [None] * len(chunk)
+                for partition in set(partitions):
+                    members = [i for i, name in enumerate(partitions) if name == partition]
+                    start, stop = artifacts.partitions.get(partition, (0, 0))
+                    query_nutrients = np.stack([nutrient_query(chunk[i][0]) for i in members])
+                    ingredient_scores = query_embeddings[members] @ np.asarray(embeddings[start:stop]).T
+                    nutrient_scores = query_nutrients @ artifacts.nutrients_normalized[start:stop].T
+                    scores = config.ingredient_weight * ingredient_scores + config.nutrient_weight * nutrient_scores
+                    for i, top in zip(members, top_k_rows(scores, config.top_k)):
+                        results[i] = start + top
+                for i, top_rows in enumerate(results):
+                    yield position + i, df.iloc[top_rows][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+                position += len(chunk)
+                continue
+
+            # Stage one, grouped by partition
+            for partition in set(partitions):
+                members = [i for i, name in enumerate(partitions) if name == partition]
+                start, stop = artifacts.partitions.get(partition, (0, 0))
+                partition_embeddings = embeddings[start:stop]
+
+                if mode == "approx" and partition in artifacts.ann_indexes:
+                    for i in members:
+                        rows, scores = artifacts.ann_indexes[partition].search(
+                            query_embeddings[i], partition_embeddings, config.candidate_pool_size, n_probe=n_probe
+                        )
+                        candidates[i] = (start + rows, scores)
+                elif artifacts.quantized is not None:
+                    results = artifacts.quantized[start:stop].search_batch(
+                        query_embeddings[members], partition_embeddings, config.candidate_pool_size
+                    )
+                    for i, (rows, scores) in zip(members, results):
+                        candidates[i] = (start + rows, scores)
+                else:
+                    scores = query_embeddings[members] @ np.asarray(partition_embeddings).T
+                    top = top_k_rows(scores, config.candidate_pool_size)
+                    for row, i in enumerate(members):
+                        candidates[i] = (start + top[row], scores[row, top[row]])
+
+            # Stage two and output, one user at a time
+            for i, (nutrients, _, _) in enumerate(chunk):
+                rows, ingredient_similarities = candidates[i]
+                top_rows, _, _, _ = rank_candidates(rows, ingredient_similarities, artifacts.nutrients_normalized,
+                                                    nutrient_query(nutrients), config)
+                yield position + i, df.iloc[top_rows][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+            position += len(chunk)
+
+    def recommend(self, nutrients, ingredients, diet_preference, mode=DEFAULT_SEARCH_MODE, n_probe=DEFAULT_N_PROBE,
+                  config=None, query_mode=DEFAULT_QUERY_MODE):
+        """
+        Recommend recipes based on user nutrients, ingredients, and dietary preference.
+        Args:
+            nutrients (dict): target value per nutrient column
+            ingredients (list): selected food descriptions
+            diet_preference (str): "Veg" restricts to vegetarian recipes
+            mode (str): "exact" or "approx" ingredient search, "nutrient" only, or "hybrid" over the partition
+            n_probe (int): IVF cells scanned in "approx" mode
+            config (ScoringConfig): weights, candidate pool size and number of results
+            query_mode (str): "pooled", "exact" or "model" query embeddings
+        Returns:
+            list: top recipes as dicts
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search mode: {mode}. Choose from: {', '.join(SEARCH_MODES)}")
+        config = config or ScoringConfig()
+        # One generation for the whole call, even if a reload happens meanwhile
+        artifacts = self.snapshot()
+        df, embeddings = artifacts.df, artifacts.embeddings
+
+        # Nutrient-only search: nearest recipes to the slider targets, no ingredient stage
+        if mode == "nutrient":
+            top_rows = self.nutrient_search([nutrients], partition_for(diet_preference), config.top_k, artifacts)[0]
+            return df.iloc[top_rows][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+
+        # Encode input ingredients (stored embeddings are already L2-normalised)
+        input_embedding = self.encode_queries([ingredients], query_mode, artifacts)[0]
+
+        # Filter by dietary preference: the partition is a contiguous slice (a view, not a copy)
+        partition = partition_for(diet_preference)
+        start, stop = artifacts.partitions.get(partition, (0, 0))
+        partition_embeddings = embeddings[start:stop]
+
+        # Single stage: both similarities for every recipe of the partition, then the top k
+        if mode == "hybrid":
+            top, _, _, _ = rank_partition(np.asarray(partition_embeddings) @ input_embedding,
+                                          artifacts.nutrients_normalized[start:stop], nutrient_query(nutrients), config)
+            return df.iloc[start + top][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+
+        if mode == "approx" and partition not in artifacts.ann_indexes:
+            print(f"⚠️ No ANN index found for '{partition}', falling back to exact search.")
+            mode = "exact"
+
+        # Stage one: cosine similarity on ingredients, top candidates only
+        if mode == "approx":
+            rows, ingredient_similarities = artifacts.ann_indexes[partition].search(
+                input_embedding, partition_embeddings, config.candidate_pool_size, n_probe=n_probe
+            )
+        elif artifacts.quantized is not None:
+            rows, ingredient_similarities = artifacts.quantized[start:stop].search(
+                input_embedding, partition_embeddings, config.candidate_pool_size
+            )
+        else:
+            rows, ingredient_similarities = exact_search(input_embedding, partition_embeddings,
+                                                         config.candidate_pool_size)
+
+        # Stage two: weighted blend with nutrient cosine similarity, vectorised over the pool
+        top_rows, _, _, _ = rank_candidates(start + rows, ingredient_similarities, artifacts.nutrients_normalized,
+                                            nutrient_query(nutrients), config)
+
+        # Only the final rows become dicts
+        return df.iloc[top_rows][RECOMMENDATION_COLUMNS].to_dict(orient="records")
+
+
+def _chunked(items, size):
+    """Split an iterable into lists of at most size items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_recommender = None
+_recommender_lock = threading.Lock()
+
+
+def get_recommender():
+    """Return the process-wide recommender shared by every Streamlit session."""
+    global _recommender
+    if _recommender is None:
+        with _recommender_lock:
+            if _recommender is None:
+                _recommender = RecipeRecommender()
+                atexit.register(_recommender.save_query_cache)
+                if BACKGROUND_WARM_UP:
+                    _recommender.start_warm_up()
+    return _recommender
+
+
+def recommend_recipes(nutrients, ingredients, diet_preference, mode=DEFAULT_SEARCH_MODE, config=None,
+                      query_mode=DEFAULT_QUERY_MODE):
+    """Recommend recipes based on user nutrients, ingredients, and dietary preference."""
+    return get_recommender().recommend(nutrients, ingredients, diet_preference, mode=mode, config=config,
+                                       query_mode=query_mode)
+
+
+def recommend_recipes_batch(queries, mode=DEFAULT_SEARCH_MODE, config=None, batch_size=BATCH_SIZE,
+                            query_mode=DEFAULT_QUERY_MODE):
+    """
+    Recommend recipes for many (nutrients, ingredients, diet_preference) queries.
+    Results stream out as (query position, recipes) pairs in input order.
+    """
+    return get_recommender().recommend_batch(queries, mode=mode, config=config, batch_size=batch_size,
+                                             query_mode=query_mode)
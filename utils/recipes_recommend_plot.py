@@ -1,9 +1,9 @@
 import numpy as np
 import pandas as pd
 import torch
-from sentence_transformers import SentenceTransformer, util
 from sklearn.metrics.pairwise import cosine_similarity
-import pickle
+from utils.recipes_embeddings import load_embeddings, normalize_rows
+from utils.sentence_model import load_sentence_model
 
 # Set device (CPU or GPU)
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -17,33 +17,27 @@ class MyCustomClass:
 
 # Load model
 def load_data():
-    """ Load dataset with embeddings """
-    df = pd.read_csv("data/embeddings/recipes.csv")
-    
-    # Ensure embeddings are properly converted to tensors and moved to the correct device
-    df["IngredientEmbedding"] = df["IngredientEmbedding"].apply(lambda x: torch.tensor(eval(x)).to(device))
-
-    with open("models/recipes_st.pkl", "rb") as model_file:
-        model_st = pickle.load(model_file)
-
-    return df, model_st
+    """ Load recipe metadata with the memory-mapped embedding matrix """
+    df, embeddings, _ = load_embeddings()
+    model_st, _, _ = load_sentence_model()
+    return df, embeddings, model_st
 
 def recommend_recipes(nutrients, ingredients, diet_preference):
 #def recommend_recipes(ingredients, diet_preference):
     """Recommend recipes based on user nutrients, ingredients, and dietary preference."""
-    df, model_st = load_data()
+    df, embeddings, model_st = load_data()
 
     # Filter by dietary preference
     if diet_preference == "Veg":
-        df_filtered = df[df["DietaryCategory"] == diet_preference].copy()
+        mask = (df["DietaryCategory"] == diet_preference).to_numpy()
+        df_filtered = df[mask].copy()
+        ingredient_embeddings = embeddings[mask]
     else:
         df_filtered = df.copy()
+        ingredient_embeddings = embeddings
 
-    # Encode input ingredients and move them to the same device
-    input_embedding = model_st.encode(" ".join(ingredients), convert_to_tensor=True).to(device)
-
-    # Stack ingredient embeddings and move to the same device
-    ingredient_embeddings = torch.stack(df_filtered["IngredientEmbedding"].tolist()).to(device)
+    # Encode input ingredients (stored embeddings are already L2-normalised)
+    input_embedding = normalize_rows(model_st.encode(" ".join(ingredients), convert_to_numpy=True))
 
     """# Compute cosine similarity
     ingredient_similarities = util.pytorch_cos_sim(ingredient_embeddings, input_embedding).squeeze().cpu().numpy()
@@ -97,7 +91,7 @@ def recommend_recipes(nutrients, ingredients, diet_preference):
     ].to_dict(orient="records")"""
 # trying to get recommendation in two steps
 # Compute cosine similarity
-    ingredient_similarities = util.pytorch_cos_sim(ingredient_embeddings, input_embedding).squeeze().cpu().numpy()
+    ingredient_similarities = ingredient_embeddings @ input_embedding
 
  # Add similarity scores to DataFrame
    # 
@@ -138,11 +132,10 @@ def recommend_recipes(nutrients, ingredients, diet_preference):
     
     # Displaying input and recipe embeddings with cosine similarity and nutritional values
     for idx, recipe in top_recipes.iterrows():
-        recipe_embedding = recipe["IngredientEmbedding"]  # The recipe's embedding from your DataFrame
-        recipe_embedding_tensor = torch.tensor(recipe_embedding).to(device)
+        recipe_embedding = embeddings[idx]  # The recipe's row in the embedding matrix
 
         # Calculate cosine similarity for input vs. recipe
-        embedding_similarity = util.pytorch_cos_sim(input_embedding, recipe_embedding_tensor).item()
+        embedding_similarity = float(recipe_embedding @ input_embedding)
 
         # print(f"Recipe: {recipe['Name']}")
         # print(f"Input Ingredient Embedding: {input_embedding.cpu().numpy()}")
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+# Nutrients exposed as sliders on the recipes page
+NUTRIENT_COLUMNS = ["Calories", "FatContent", "CarbohydrateContent", "FiberContent",
+                    "SugarContent", "ProteinContent"]
+
+
+@dataclass
+class ScoringConfig:
+    """Weights and sizes of the two-stage recipe ranker."""
+    ingredient_weight: float = 0.5
+    nutrient_weight: float = 0.5
+    candidate_pool_size: int = 50  # recipes kept by the ingredient stage
+    top_k: int = 5                 # recipes returned
+
+
+def top_k_indices(scores, k):
+    """Indices of the k largest scores, best first (partial selection, no full sort)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def top_k_rows(scores, k):
+    """Row-wise top_k_indices for a (queries x rows) score matrix."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def nutrient_matrix(df, columns=NUTRIENT_COLUMNS):
+    """
+    Precompute the row-normalised nutrient matrix so nutrient cosine similarity is a dot product.
+    Rows with no nutrient data stay all-zero and score 0.
+    """
+    matrix = df[columns].fillna(0).to_numpy(dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def nutrient_query(nutrients, columns=NUTRIENT_COLUMNS):
+    """Normalised nutrient target vector built from the slider values."""
+    query = np.array([nutrients[col] for col in columns], dtype=np.float32)
+    norm = np.linalg.norm(query)
+    return query / norm if norm > 0 else query
+
+
+def rank_candidates(rows, ingredient_scores, nutrients_normalized, query_nutrients, config):
+    """
+    Blend ingredient and nutrient similarity for the candidate rows and keep the best.
+    Args:
+        rows (array): candidate row indices
+        ingredient_scores (array): ingredient cosine similarity per candidate
+        nutrients_normalized (array): row-normalised nutrient matrix indexed by row
+        query_nutrients (array): normalised nutrient target
+        config (ScoringConfig): weights and output size
+    Returns:
+        tuple: (row indices, final scores, ingredient scores, nutrient scores), best first
+    """
+    nutrient_scores = nutrients_normalized[rows] @ query_nutrients
+    scores = config.ingredient_weight * ingredient_scores + config.nutrient_weight * nutrient_scores
+    top = top_k_indices(scores, config.top_k)
+    return rows[top], scores[top], ingredient_scores[top], nutrient_scores[top]
+
+
+def rank_partition(ingredient_scores, partition_nutrients, query_nutrients, config):
+    """
+    Single-stage hybrid ranking: blend ingredient and nutrient similarity for every row of a
+    partition, so no recipe is cut before the nutrients are looked at.
+    Args:
+        ingredient_scores (array): ingredient cosine similarity per partition row
+        partition_nutrients (array): row-normalised nutrient matrix of the partition
+        query_nutrients (array): normalised nutrient target
+        config (ScoringConfig): weights and output size (candidate_pool_size is not used)
+    Returns:
+        tuple: (row indices within the partition, final scores, ingredient scores, nutrient scores), best first
+    """
+    nutrient_scores = partition_nutrients @ query_nutrients
+    scores = config.ingredient_weight * ingredient_scores + config.nutrient_weight * nutrient_scores
+    top = top_k_indices(scores, config.top_k)
+    return top, scores[top], ingredient_scores[top], nutrient_scores[top]
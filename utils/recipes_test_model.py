@@ -1,4 +1,4 @@
-from recipes_recommend import recommend_recipes
+from utils.recipes_recommend import recommend_recipes
 import pickle
 
 # Step 7: User input for testing
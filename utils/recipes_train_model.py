@@ -1,66 +1,67 @@
-import pandas as pd
+import argparse
 import torch
 from sentence_transformers import SentenceTransformer
-import pickle
-import numpy as np
-import os
-
-# Load dataset
-df = pd.read_csv("data/preprocessed/recipes.csv")
-#df =df.iloc[0:50000]
-
-# Initialize model
-#st_model = SentenceTransformer("all-MiniLM-L6-v2")
-
-#all-mpnet-base-v2
-# st_model = SentenceTransformer("all-mpnet-base-v2") - Observation Recommendation gets better but slow compared to all-MiniLM-L6-v2 
-
-#all-mpnet-base-v2
-st_model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-
-# Save the trained model
-with open("models/recipes_st.pkl", "wb") as model_file:
-    pickle.dump(st_model, model_file)
-
-
-# # Compute embeddings
-# df["IngredientEmbedding"] = df["RecipeIngredientParts"].apply(lambda x: st_model.encode(str(x), convert_to_tensor=True).tolist())
-
-# # Save embeddings
-# df.to_csv("data/embeddings/recipes.csv", index=False)
-
-# Code for batch processing
-
-# Define batch parameters
-batch_size = 5000
-num_batches = (len(df) + batch_size - 1) // batch_size  # Calculate the number of batches
-
-# Directory to save batch embeddings
-embedding_dir = "data/embeddings/batches"
-os.makedirs(embedding_dir, exist_ok=True)
-
-# Process each batch
-for i in range(num_batches):
-    start_idx = i * batch_size
-    end_idx = min((i + 1) * batch_size, len(df))
-    batch_df = df.iloc[start_idx:end_idx].copy()  # Use .copy() to avoid SettingWithCopyWarning
-
-    # Print the row indices for the current batch
-    print(f"Processing batch {i+1}/{num_batches}, rows {start_idx} to {end_idx-1}")
-
-    # Compute embeddings and add as a new column
-    batch_df["IngredientEmbedding"] = batch_df["RecipeIngredientParts"].apply(
-        lambda x: st_model.encode(str(x), convert_to_tensor=True).tolist()
-    )
-
-    # Save the updated DataFrame to CSV
-    batch_df.to_csv(f"{embedding_dir}/embeddings_batch_{i+1}.csv", index=False)
-    print(f"Saved embeddings for batch {i+1}/{num_batches}")
-
-# Optionally, concatenate all batch files into a single embeddings file
-all_embeddings = pd.concat(
-    [pd.read_csv(f"{embedding_dir}/embeddings_batch_{i+1}.csv") for i in range(num_batches)],
-    ignore_index=True
-)
-all_embeddings.to_csv("data/embeddings/recipes.csv", index=False)
-print("All batch embeddings concatenated and saved.")
+from utils.data_store import FOOD_TABLE, read_table
+from utils.food_embeddings import food_descriptions, save_food_embeddings
+from utils.recipes_embedding_builder import (CHECKPOINT_SIZE, ENCODE_BATCH_SIZE, SHARD_SIZE, ParallelEncoder,
+                                             build_recipe_embeddings, default_threads_per_worker)
+from utils.recipes_preprocess import read_preprocessed_recipes
+from utils.sentence_model import MODEL_DIR, MODEL_NAME, save_sentence_model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the recipe model and build the embedding store.")
+    parser.add_argument("--full-rebuild", action="store_true", help="re-encode every recipe")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="encoder processes; 1 encodes in this process")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch threads per encoder process (default: CPU cores / workers)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    # Load dataset
+    df = read_preprocessed_recipes()
+    #df =df.iloc[0:50000]
+
+    # Initialize model
+    #st_model = SentenceTransformer("all-MiniLM-L6-v2")
+
+    #all-mpnet-base-v2
+    # st_model = SentenceTransformer("all-mpnet-base-v2") - Observation Recommendation gets better but slow compared to all-MiniLM-L6-v2
+
+    #all-mpnet-base-v2
+    st_model = SentenceTransformer(MODEL_NAME)
+
+    # Save the trained model in the native sentence-transformers format
+    save_sentence_model(st_model)
+    print(f"✅ Sentence model saved to '{MODEL_DIR}/'.")
+
+    # Batched, incremental and resumable embedding build (see utils/recipes_embedding_builder.py)
+    if args.workers > 1:
+        threads = args.threads_per_worker or default_threads_per_worker(args.workers)
+        print(f"Encoding with {args.workers} worker processes, {threads} threads each")
+        with ParallelEncoder(MODEL_DIR, args.workers, threads) as encode:
+            build_recipe_embeddings(df, encode, model_name=MODEL_NAME, full_rebuild=args.full_rebuild,
+                                    checkpoint_size=max(CHECKPOINT_SIZE, args.workers * SHARD_SIZE))
+    else:
+        if args.threads_per_worker:
+            torch.set_num_threads(args.threads_per_worker)
+        build_recipe_embeddings(
+            df,
+            lambda texts: st_model.encode(texts, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True),
+            model_name=MODEL_NAME,
+            full_rebuild=args.full_rebuild,
+        )
+
+    # Embed every food description the recipes page can send as an ingredient
+    food_df = read_table(FOOD_TABLE, columns=["description"])
+    descriptions = food_descriptions(food_df)
+    save_food_embeddings(descriptions, st_model.encode(descriptions, convert_to_numpy=True))
+    print(f"✅ {len(descriptions)} food description embeddings saved to 'data/embeddings/foods/'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import shutil
+import time
+
+from utils.artifacts import artifact_signature, resolve_directory, swap_directory
+
+# The recipe sentence model in the native sentence-transformers format (a directory written by
+# SentenceTransformer.save), replacing the pickled models/recipes_st.pkl. Loading it only
+# deserialises the weights; sentence_transformers itself is imported on the first load.
+MODEL_NAME = "paraphrase-MiniLM-L6-v2"
+MODEL_DIR = "models/recipes_st"
+
+
+def model_files(model_dir=MODEL_DIR):
+    """Every file of a saved model, sorted (the directory mtime alone misses rewritten files)."""
+    if not os.path.isdir(model_dir):
+        return [model_dir]
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(model_dir) for name in names)
+
+
+def model_signature(model_dir=MODEL_DIR):
+    """Changes whenever the saved model is replaced."""
+    return artifact_signature(model_files(model_dir))
+
+
+def resident_memory_bytes():
+    """Resident set size of this process (peak RSS where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        import sys
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def save_sentence_model(model, model_dir=MODEL_DIR):
+    """Save next to the target and swap it in, so a running app never loads a half-written model."""
+    staging_dir = model_dir.rstrip("/") + ".staging"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    model.save(staging_dir)
+    swap_directory(staging_dir, model_dir)
+
+
+def load_sentence_model(model_dir=MODEL_DIR):
+    """
+    Load the saved sentence model.
+    Returns:
+        tuple: (model, load seconds, resident memory added by the load in bytes)
+    """
+    if not os.path.isdir(model_dir):
+        raise FileNotFoundError(f"No sentence model at '{model_dir}', run python -m utils.recipes_train_model")
+    rss_before = resident_memory_bytes()
+    started = time.perf_counter()
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(resolve_directory(model_dir))
+    return model, time.perf_counter() - started, resident_memory_bytes() - rss_before